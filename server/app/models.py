@@ -2,7 +2,8 @@ from datetime import datetime
 from sqlalchemy import orm
 
 from app.server import db, bcrypt
-from app.modules.view_helper_for_models import nested_fields
+from app.modules.common import get_natural_sort_key
+from app.modules.view_helper_for_models import derived_fields, nested_fields, normalized_fields
 
 
 class User(db.Model):
@@ -67,11 +68,15 @@ class UserConfig(db.Model):
         return '{!s} [{!r}]'.format(self.id, self.name)
 
 
+@normalized_fields(normalized_name='name')
 class Vendor(db.Model):
-    __versioned__ = {}
+    __versioned__ = {
+        'exclude': ('normalized_name', )
+    }
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(60), nullable=False, unique=True)
+    normalized_name = db.Column(db.String(60), index=True)
 
     items = db.relationship('Item', lazy='dynamic')
 
@@ -79,39 +84,54 @@ class Vendor(db.Model):
         return '{!s}'.format(self.name)
 
 
+@normalized_fields(normalized_unit='unit')
 class Unit(db.Model):
-    __versioned__ = {}
+    __versioned__ = {
+        'exclude': ('normalized_unit', )
+    }
 
     id = db.Column(db.Integer, primary_key=True)
     unit = db.Column(db.String(20), nullable=False, unique=True)
+    normalized_unit = db.Column(db.String(20), index=True)
 
     def __repr__(self)-> str:
         return '{!s}'.format(self.unit)
 
 
+@normalized_fields(normalized_name='name')
 class Customer(db.Model):
-    __versioned__ = {}
+    __versioned__ = {
+        'exclude': ('normalized_name', )
+    }
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(60), nullable=False, unique=True)
+    normalized_name = db.Column(db.String(60), index=True)
 
     def __repr__(self)-> str:
         return '{!s}'.format(self.name)
 
 
 @nested_fields(vendor=Vendor, unit=Unit)
+@normalized_fields(normalized_name='name', normalized_article_number='article_number')
+@derived_fields(get_natural_sort_key, location_sort_key='location')
 class Item(db.Model):
-    __versioned__ = {}
+    __versioned__ = {
+        'exclude': ('normalized_name', 'normalized_article_number', 'location_sort_key')
+    }
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(60), nullable=False, unique=True)
-    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False)
-    article_number = db.Column(db.String(20))
-    quantity = db.Column(db.Float, nullable=False, default=0.0)
+    normalized_name = db.Column(db.String(60), index=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False, index=True)
+    article_number = db.Column(db.String(20), index=True)
+    normalized_article_number = db.Column(db.String(20), index=True)
+    quantity = db.Column(db.Float, nullable=False, default=0.0, index=True)
     warning_quantity = db.Column(db.Float, nullable=False, default=0.0)
     purchase_price = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
-    unit_id = db.Column(db.Integer, db.ForeignKey('unit.id'), nullable=False)
-    location = db.Column(db.String(15))
+    unit_id = db.Column(db.Integer, db.ForeignKey('unit.id'), nullable=False, index=True)
+    location = db.Column(db.String(15), index=True)
+    location_sort_key = db.Column(db.String(45), index=True)
 
     vendor = db.relationship('Vendor', lazy='joined')
     unit = db.relationship('Unit', lazy='joined')
@@ -144,12 +164,12 @@ class Work(db.Model):
     __versioned__ = {}
 
     id = db.Column(db.Integer, primary_key=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False, index=True)
     comment = db.Column(db.Text)
     outbound_close_timestamp = db.Column(db.DateTime)
     outbound_close_user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     returned_close_timestamp = db.Column(db.DateTime)
-    returned_close_user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    returned_close_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
 
     customer = db.relationship('Customer', lazy='joined')
     outbound_close_user = db.relationship('User', foreign_keys=[outbound_close_user_id], lazy='joined')
@@ -285,5 +305,16 @@ class StocktakingItem(db.Model):
         return '{!s} [{!r}]'.format(self.id, self.item)
 
 
+class Counter(db.Model):
+    """
+    Named counter of the next free value of numbers allocated by blocks (see HiLoAllocator)
+    """
+    name = db.Column(db.String(30), primary_key=True)
+    value = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self)-> str:
+        return '{!s} [{!r}]'.format(self.name, self.value)
+
+
 # Setup SQLAlchemy-Continuum tables and hooks
 orm.configure_mappers()
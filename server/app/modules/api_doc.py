@@ -39,6 +39,7 @@ class ApiDoc:
     __STATUSES = {
         200: ['OK', 'no error'],
         201: ['CREATED', 'no error'],
+        202: ['ACCEPTED', 'no error'],
         401: ['UNAUTHORIZED', 'user was not logged in'],
         403: ['FORBIDDEN', 'user has not enough rights'],
         404: ['NOT FOUND', ''],
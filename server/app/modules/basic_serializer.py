@@ -1,3 +1,8 @@
+from keyword import iskeyword
+
+FAST_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f+00:00'
+
+
 class BasicSerializer:
     """
     Basic serializer for better performance than marshmallow or restful serializers
@@ -11,41 +16,204 @@ class BasicSerializer:
     ... nested_fields = {
     ...     'item': ItemSerializer(),
     ... }
+
+    Serializer of a subset of fields can be made by ``only()``:
+    >>> TestSerializer().only({'id', 'item'}).dump(model_object)
+
+    The ``dump_many_included()`` de-duplicates the nested objects; they are dumped once into the ``included`` side
+    table (by field name and id), and the results refer them by id:
+    >>> TestSerializer().dump_many_included(model_objects)
+    {'items': [{'id': 1, 'comment': None, 'timestamp': None, 'item': 3}, ...], 'included': {'item': {'3': {...}}}}
+
+    A specialised dump function is generated for every serializer class at its first use (the nested serializers are
+    inlined into that), therefore the fields can not be changed after the first dump.
     """
-    REST_API_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f+00:00'
+    REST_API_DATE_FORMAT = FAST_DATE_FORMAT
 
     fields = ()
     datetime_fields = ()
     nested_fields = {}
 
     def dump(self, model_object) -> dict:
-        if model_object is None:
-            return self._dump_nones()
+        self.dump = self._get_compiled_dump()
+        return self.dump(model_object)
 
-        result = dict((name, getattr(model_object, name)) for name in self.fields)
+    def dump_many(self, items) -> list:
+        return list(map(self._get_compiled_dump(), items))
 
-        for name in self.datetime_fields:
-            date = getattr(model_object, name)
-            if date is None:
-                result[name] = None
-            else:
-                result[name] = date.strftime(self.REST_API_DATE_FORMAT)
+    def dump_many_included(self, items) -> dict:
+        included = {}
+        return {
+            'items': [self._dump_included(item, included) for item in items],
+            'included': included,
+        }
+
+    def _dump_included(self, model_object, included: dict) -> dict:
+        result = self._get_flat_dump()(model_object)
 
         for name, serializer in self.nested_fields.items():
-            result[name] = serializer.dump(getattr(model_object, name))
+            nested_object = getattr(model_object, name)
+            if nested_object is None:
+                result[name] = None
+                continue
+            if 'id' not in serializer.fields:
+                result[name] = serializer.dump(nested_object)
+                continue
+
+            nested_id = nested_object.id
+            result[name] = nested_id
+
+            nested_objects = included.setdefault(name, {})
+            if str(nested_id) not in nested_objects.keys():
+                nested_objects[str(nested_id)] = serializer._dump_included(nested_object, included)
 
         return result
 
-    def dump_many(self, items) -> list:
-        return [self.dump(item) for item in items]
+    @property
+    def field_names(self) -> set:
+        return set(self.fields) | set(self.datetime_fields) | set(self.nested_fields.keys())
 
-    def _dump_nones(self) -> dict:
-        result = dict((name, None) for name in self.fields)
+    def only(self, names: (list, set, tuple)) -> 'BasicSerializer':
+        """
+        Get a serializer of the same class what dumps the selected fields only
+        """
+        names = frozenset(names)
+        partials = self.__dict__.setdefault('_partial_serializers', {})
 
-        for name in self.datetime_fields:
-            result[name] = None
+        if names not in partials:
+            partial_class = type(self.__class__.__name__, (self.__class__, ), {
+                'fields': tuple(name for name in self.fields if name in names),
+                'datetime_fields': tuple(name for name in self.datetime_fields if name in names),
+                'nested_fields': dict((name, serializer) for name, serializer in self.nested_fields.items()
+                                      if name in names),
+            })
+            partials[names] = partial_class()
+        return partials[names]
 
-        for name, serializer in self.nested_fields.items():
-            result[name] = serializer.dump(None)
+    def _get_flat_dump(self) -> callable:
+        """
+        Get dump function of the not nested fields
+        """
+        if '_flat_dump' not in self.__dict__.keys():
+            self._flat_dump = self.only(set(self.fields) | set(self.datetime_fields))._get_compiled_dump()
+        return self._flat_dump
 
-        return result
+    @classmethod
+    def _get_compiled_dump(cls) -> callable:
+        if '_compiled_dump' not in cls.__dict__:
+            cls._compiled_dump = staticmethod(_DumpCompiler(cls).compile())
+        return cls.__dict__['_compiled_dump'].__func__
+
+
+def format_datetime(date) -> (str, None):
+    """
+    Format datetime by FAST_DATE_FORMAT faster than strftime
+    """
+    if date is None:
+        return None
+    return '%04d-%02d-%02dT%02d:%02d:%02d.%06d+00:00' % (date.year, date.month, date.day, date.hour, date.minute,
+                                                         date.second, date.microsecond)
+
+
+def get_datetime_source(value_source: str, date_format: str) -> str:
+    """
+    Get source code what formats a datetime value in a generated dump function
+    """
+    if date_format == FAST_DATE_FORMAT:
+        return 'format_datetime({})'.format(value_source)
+    return '(None if {value} is None else {value}.strftime({date_format!r}))'.format(
+        value=value_source, date_format=date_format)
+
+
+def compile_dump(source: str, namespace: (dict, None)=None) -> callable:
+    """
+    Compile the generated source code of a dump function; the source can refer format_datetime and the namespace
+    """
+    namespace = dict(namespace or {}, format_datetime=format_datetime)
+    exec(source, namespace)
+    return namespace['dump']
+
+
+class _DumpCompiler:
+    """
+    Generate source code of a dump function for a serializer class, and compile it
+    """
+    def __init__(self, serializer_class: type):
+        self.__serializer_class = serializer_class
+        self.__namespace = {}
+        self.__variable_count = 0
+
+    def compile(self) -> callable:
+        lines = [
+            'def dump(model_object):',
+            '    if model_object is None:',
+            '        return {}'.format(self.__get_nones_source(self.__serializer_class)),
+        ]
+        lines.extend(self.__get_dump_lines(self.__serializer_class, 'model_object', 'result', indentation=1))
+        lines.append('    return result')
+
+        return compile_dump('\n'.join(lines), self.__namespace)
+
+    def __get_dump_lines(self, serializer_class: type, object_name: str, result_name: str, indentation: int) -> list:
+        prefix = '    ' * indentation
+
+        items = ['{!r}: {}'.format(name, self.__get_attribute_source(object_name, name))
+                 for name in serializer_class.fields]
+        items += ['{!r}: {}'.format(name, self.__get_datetime_source(serializer_class, object_name, name))
+                  for name in serializer_class.datetime_fields]
+        lines = ['{}{} = {{{}}}'.format(prefix, result_name, ', '.join(items))]
+
+        for name, serializer in serializer_class.nested_fields.items():
+            nested_object_name = self.__get_new_variable_name('nested')
+            lines.append('{}{} = {}'.format(prefix, nested_object_name, self.__get_attribute_source(object_name, name)))
+
+            if not self.__can_be_inlined(serializer):
+                lines.append('{}{}[{!r}] = {}({})'.format(prefix, result_name, name,
+                                                          self.__add_to_namespace('dump', serializer.dump),
+                                                          nested_object_name))
+                continue
+
+            nested_result_name = self.__get_new_variable_name('result')
+            lines.append('{}if {} is None:'.format(prefix, nested_object_name))
+            lines.append('{}    {}[{!r}] = {}'.format(prefix, result_name, name,
+                                                      self.__get_nones_source(serializer.__class__)))
+            lines.append('{}else:'.format(prefix))
+            lines.extend(self.__get_dump_lines(serializer.__class__, nested_object_name, nested_result_name,
+                                               indentation + 1))
+            lines.append('{}    {}[{!r}] = {}'.format(prefix, result_name, name, nested_result_name))
+
+        return lines
+
+    def __get_nones_source(self, serializer_class: type) -> str:
+        items = ['{!r}: None'.format(name) for name in serializer_class.fields]
+        items += ['{!r}: None'.format(name) for name in serializer_class.datetime_fields]
+
+        for name, serializer in serializer_class.nested_fields.items():
+            if self.__can_be_inlined(serializer):
+                nested_source = self.__get_nones_source(serializer.__class__)
+            else:
+                nested_source = '{}(None)'.format(self.__add_to_namespace('dump', serializer.dump))
+            items.append('{!r}: {}'.format(name, nested_source))
+
+        return '{{{}}}'.format(', '.join(items))
+
+    def __get_datetime_source(self, serializer_class: type, object_name: str, name: str) -> str:
+        return get_datetime_source(self.__get_attribute_source(object_name, name),
+                                   serializer_class.REST_API_DATE_FORMAT)
+
+    def __get_attribute_source(self, object_name: str, name: str) -> str:
+        if name.isidentifier() and not iskeyword(name):
+            return '{}.{}'.format(object_name, name)
+        return 'getattr({}, {!r})'.format(object_name, name)
+
+    def __can_be_inlined(self, serializer) -> bool:
+        return isinstance(serializer, BasicSerializer) and type(serializer).dump is BasicSerializer.dump
+
+    def __add_to_namespace(self, prefix: str, value) -> str:
+        name = self.__get_new_variable_name(prefix)
+        self.__namespace[name] = value
+        return name
+
+    def __get_new_variable_name(self, prefix: str) -> str:
+        self.__variable_count += 1
+        return '_{}_{}'.format(prefix, self.__variable_count)
@@ -1,3 +1,5 @@
+import re
+import unicodedata
 from functools import wraps
 from threading import Thread
 
@@ -22,6 +24,31 @@ def recursive_dict_update(dictionary: dict, updater: dict):
             dictionary[key] = value
 
 
+def normalize_text(text: (str, None)) -> (str, None):
+    """
+    Get lower case text without accents (e.g. 'Árvíztűrő' -> 'arvizturo') for accent- and case-insensitive matching
+    """
+    if text is None:
+        return None
+    return ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char)).lower()
+
+
+def get_natural_sort_key(text: (str, None)) -> (str, None):
+    """
+    Get normalized text what orders numbers by their value (e.g. 'A2/3' < 'A12/3'), for sorting by the database
+
+    The numbers are prefixed by their length in two digits, e.g. 'A12/3' -> 'a0212/013'.
+    """
+    if text is None:
+        return None
+    return re.sub('[0-9]+', _get_natural_sort_key_of_number, normalize_text(text))
+
+
+def _get_natural_sort_key_of_number(match) -> str:
+    number = match.group(0).lstrip('0') or '0'
+    return '{:02d}{}'.format(len(number), number)
+
+
 class CreateObject:
     def __init__(self, **entries):
         self.__dict__.update(entries)
@@ -162,6 +162,10 @@ class ExampleItemSearchResults:
                                       'vendor': 'Import'})
 
 
+class ExampleItemSearchCaches:
+    CACHE1 = FilterableDict(getters={'max_size': 1000, 'size': 84, 'hits': 2315, 'misses': 406})
+
+
 class ExampleAcquisitionItems:
     ITEM1 = FilterableDict(commons={'item': ExampleItems.ITEM2.get(), 'quantity': 132.4},
                            getters={'id': 1})
@@ -187,6 +191,7 @@ class ExampleBarcodes:
                                        'item_id': 1, 'master': False, 'main': False})
     BARCODE3 = FilterableDict(getters={'id': 3, 'barcode': ExampleBarcode.generate_main(), 'quantity': 35.0,
                                        'item_id': 2, 'master': False, 'main': True})
+    BARCODE1_WITH_ITEM = BARCODE1.get_changed(getters={'item': ExampleItems.ITEM1.get()})
 
 
 class ExampleItemBarcodes:
@@ -198,10 +203,24 @@ class ExampleItemBarcodes:
                               getters={'id': 3, 'main': True, 'barcode': ExampleBarcode.generate_main()})
 
 
+class ExampleBarcodeGenerations:
+    GENERATION1 = FilterableDict(setters={'item_ids': [1, 2], 'quantity': 2.0})
+    BARCODE1 = FilterableDict(getters={'id': 3, 'barcode': ExampleBarcode.generate_main(), 'quantity': 2.0,
+                                       'item_id': 1, 'master': False, 'main': True})
+    BARCODE2 = FilterableDict(getters={'id': 4, 'barcode': ExampleBarcode.generate_main(), 'quantity': 2.0,
+                                       'item_id': 2, 'master': True, 'main': True})
+
+
 class ExampleItemBarcodePrints:
     PRINT1 = FilterableDict(setters={'copies': 3})
 
 
+class ExamplePrintJobs:
+    JOB1 = FilterableDict(getters={'id': 1, 'status': 'queued', 'copies': 3, 'printed_copies': 0, 'attempts': 0,
+                                   'error': None})
+    JOB1_DONE = JOB1.get_changed(getters={'status': 'done', 'printed_copies': 3, 'attempts': 1})
+
+
 class ExampleWorks:
     WORK1 = FilterableDict(commons={'customer': ExampleCustomers.CUSTOMER1.get(), 'comment': 'First work'},
                            getters={'id': 1, 'outbound_close_timestamp': None,
@@ -0,0 +1,88 @@
+import threading
+import weakref
+from sqlalchemy import event, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.models import Counter
+
+
+class HiLoAllocator:
+    """
+    Allocator of numbers what are unique across processes by blocks of a database counter (hi-lo)
+
+    A block of numbers is reserved by the counter in its own transaction, and then the numbers are allocated from the
+    block in memory. The not allocated numbers of the last block of a process are skipped. The counter is created by
+    the given function of the first number (e.g. for continuing the former numbers).
+
+    Many numbers can be allocated at once as a contiguous block reserved directly by the counter.
+
+    Example usage:
+    >>> allocator = HiLoAllocator('barcode', block_size=20, get_first_number=lambda connection: 1)
+    >>> allocator.allocate(db.engine)
+    1
+    >>> allocator.allocate_block(db.engine, 3)
+    range(21, 24)
+    """
+    __RESERVE_RETRY_COUNT = 2
+
+    __allocators = weakref.WeakSet()
+
+    @classmethod
+    def reset(cls):
+        """
+        Forget the reserved blocks (e.g. when the table of counters is dropped)
+        """
+        for allocator in list(cls.__allocators):
+            allocator.__reset()
+
+    def __init__(self, name: str, block_size: int, get_first_number: callable):
+        self.__name = name
+        self.__block_size = block_size
+        self.__get_first_number = get_first_number
+        self.__blocks = {}
+        self.__lock = threading.Lock()
+        HiLoAllocator.__allocators.add(self)
+
+    def allocate(self, engine: Engine) -> int:
+        with self.__lock:
+            url = str(engine.url)
+            next_number, end = self.__blocks.get(url, (0, 0))
+            if next_number >= end:
+                next_number, end = self.__reserve_block(engine, self.__block_size)
+            self.__blocks[url] = (next_number + 1, end)
+            return next_number
+
+    def allocate_block(self, engine: Engine, size: int) -> range:
+        return range(*self.__reserve_block(engine, size))
+
+    def __reset(self):
+        with self.__lock:
+            self.__blocks.clear()
+
+    def __reserve_block(self, engine: Engine, size: int) -> tuple:
+        for retried_count in range(self.__RESERVE_RETRY_COUNT):
+            try:
+                with engine.begin() as connection:
+                    return self.__reserve_block_by_connection(connection, size)
+            except IntegrityError:
+                # the counter has been created by another process meanwhile
+                if retried_count == self.__RESERVE_RETRY_COUNT - 1:
+                    raise
+
+    def __reserve_block_by_connection(self, connection: Connection, size: int) -> tuple:
+        counter = Counter.__table__
+        result = connection.execute(counter.update().where(counter.c.name == self.__name).values(
+            value=counter.c.value + size))
+        if result.rowcount == 0:
+            first_number = self.__get_first_number(connection)
+            connection.execute(counter.insert().values(name=self.__name, value=first_number + size))
+            return first_number, first_number + size
+
+        end = connection.execute(select([counter.c.value]).where(counter.c.name == self.__name)).scalar()
+        return end - size, end
+
+
+@event.listens_for(Counter.__table__, 'before_drop')
+def _reset_allocators(target, connection: Connection, **kwargs):
+    HiLoAllocator.reset()
@@ -0,0 +1,533 @@
+import re
+import threading
+import time
+from itertools import chain
+from sqlalchemy import Float, String, cast, event, false, func, literal, null, or_, select, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import table, column
+from sqlalchemy_continuum import Operation, version_class
+
+from app.models import Item, Barcode, Unit, Vendor
+from app.modules.common import normalize_text
+from app.modules.list_filter import get_prefix_criterion
+from app.modules.lru_cache import LruCache
+from app.server import config
+
+_SEARCHED_MODELS = (Barcode, Item)
+# the results contain the names of vendors and units too
+_RESULT_MODELS = _SEARCHED_MODELS + (Unit, Vendor)
+_TRANSACTION_IDS_QUERY = select([select([func.max(version_class(model).transaction_id)]).as_scalar()
+                                 for model in _RESULT_MODELS])
+# the count of versions in a window of recent transaction ids is changed by transactions what commit after later ones
+_TRANSACTION_ID_WINDOW = 100
+_VERSION_STATE_QUERY = select(list(_TRANSACTION_IDS_QUERY.inner_columns) + [
+    select([func.count()]).where(
+        version_class(model).transaction_id > select([func.max(version_class(model).transaction_id)]).as_scalar() -
+        _TRANSACTION_ID_WINDOW
+    ).as_scalar()
+    for model in _RESULT_MODELS
+])
+
+
+def get_transaction_ids(connection: Connection) -> tuple:
+    """
+    Get the ids of last transactions what changed barcodes, items, units and vendors (in this order)
+    """
+    return tuple(transaction_id or 0 for transaction_id in connection.execute(_TRANSACTION_IDS_QUERY).first())
+
+
+class FullTextIndex:
+    """
+    SQLite FTS5 index of item names, article numbers and barcodes
+
+    The index tables are external content tables of the ``item`` and ``barcode`` tables, and these are kept in sync by
+    triggers on insert, update and delete. On other database backends (or without FTS5) the index is not created.
+    """
+    TABLES = {
+        'item': ('name', 'article_number'),
+        'barcode': ('barcode', ),
+    }
+
+    __CREATE_STATEMENTS = [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5({columns}, content=\'{table}\', '
+        'content_rowid=\'id\')',
+
+        'CREATE TRIGGER IF NOT EXISTS {table}_fts_after_insert AFTER INSERT ON {table} BEGIN '
+        'INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.id, {new_columns}); '
+        'END',
+
+        'CREATE TRIGGER IF NOT EXISTS {table}_fts_after_delete AFTER DELETE ON {table} BEGIN '
+        'INSERT INTO {table}_fts({table}_fts, rowid, {columns}) VALUES (\'delete\', old.id, {old_columns}); '
+        'END',
+
+        'CREATE TRIGGER IF NOT EXISTS {table}_fts_after_update AFTER UPDATE OF {columns} ON {table} BEGIN '
+        'INSERT INTO {table}_fts({table}_fts, rowid, {columns}) VALUES (\'delete\', old.id, {old_columns}); '
+        'INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.id, {new_columns}); '
+        'END',
+
+        'INSERT INTO {table}_fts({table}_fts) VALUES (\'rebuild\')',
+    ]
+
+    @classmethod
+    def is_supported(cls, connection: Connection) -> bool:
+        if connection.dialect.name != 'sqlite':
+            return False
+        return any(row[0] == 'ENABLE_FTS5' for row in connection.execute('PRAGMA compile_options'))
+
+    @classmethod
+    def is_created(cls, connection: Connection) -> bool:
+        if connection.dialect.name != 'sqlite':
+            return False
+        return connection.execute('SELECT count(*) FROM sqlite_master WHERE type = \'table\' AND name IN '
+                                  '(\'item_fts\', \'barcode_fts\')').scalar() == len(cls.TABLES)
+
+    @classmethod
+    def create(cls, connection: Connection, table_name: str):
+        """
+        Create (and fill up) the index of a table when FTS5 is supported
+        """
+        if not cls.is_supported(connection):
+            return
+
+        columns = cls.TABLES[table_name]
+        arguments = {
+            'table': table_name,
+            'columns': ', '.join(columns),
+            'new_columns': ', '.join('new.{}'.format(name) for name in columns),
+            'old_columns': ', '.join('old.{}'.format(name) for name in columns),
+        }
+        for statement in cls.__CREATE_STATEMENTS:
+            connection.execute(statement.format(**arguments))
+
+    @classmethod
+    def drop(cls, connection: Connection, table_name: str):
+        if connection.dialect.name != 'sqlite':
+            return
+
+        for trigger_suffix in ('after_insert', 'after_delete', 'after_update'):
+            connection.execute('DROP TRIGGER IF EXISTS {}_fts_{}'.format(table_name, trigger_suffix))
+        connection.execute('DROP TABLE IF EXISTS {}_fts'.format(table_name))
+
+
+@event.listens_for(Item.__table__, 'after_create')
+@event.listens_for(Barcode.__table__, 'after_create')
+def _create_full_text_index(target, connection: Connection, **kwargs):
+    FullTextIndex.create(connection, target.name)
+
+
+@event.listens_for(Item.__table__, 'before_drop')
+@event.listens_for(Barcode.__table__, 'before_drop')
+def _drop_full_text_index(target, connection: Connection, **kwargs):
+    FullTextIndex.drop(connection, target.name)
+    ItemSearch.reset()
+
+
+class TrigramIndex:
+    """
+    In-memory trigram index of item names, article numbers and barcodes for substring search
+
+    The index is built at the first search, and then it is updated by the changes of committed sessions. The changes
+    committed by other processes (e.g. by other workers of the server) are caught up from the version tables before
+    each search. A transaction can commit after a later one (its id is taken at its first flush), therefore a window of
+    recent transaction ids is scanned again by every catch-up, and the rows of the not yet applied transactions are
+    updated by their versions in the window.
+    """
+    COLUMNS = {
+        Item: ('name', 'article_number'),
+        Barcode: ('barcode', ),
+    }
+
+    __indexes = {}
+    __indexes_lock = threading.Lock()
+    __TRANSACTION_ID_WINDOW = 100
+
+    @classmethod
+    def get(cls, url: str) -> 'TrigramIndex':
+        """
+        Get the index of a database
+        """
+        with cls.__indexes_lock:
+            if url not in cls.__indexes.keys():
+                cls.__indexes[url] = cls()
+            return cls.__indexes[url]
+
+    @classmethod
+    def reset(cls):
+        with cls.__indexes_lock:
+            cls.__indexes.clear()
+
+    @staticmethod
+    def get_trigrams(text: str) -> set:
+        return {text[index:index + 3] for index in range(len(text) - 2)}
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__texts = {model: {} for model in self.COLUMNS.keys()}
+        self.__postings = {model: {} for model in self.COLUMNS.keys()}
+        self.__transaction_ids = None
+        self.__applied_transaction_ids = {model: set() for model in self.COLUMNS.keys()}
+
+    def is_built(self) -> bool:
+        return self.__transaction_ids is not None
+
+    def synchronize(self, connection: Connection):
+        """
+        Build the index, or catch up the committed changes from the version tables since the last synchronization
+        """
+        transaction_ids = get_transaction_ids(connection)[:len(_SEARCHED_MODELS)]
+        with self.__lock:
+            if transaction_ids == self.__transaction_ids:
+                return
+            if not self.is_built() or any(new < old for new, old in zip(transaction_ids, self.__transaction_ids)):
+                self.__build(connection, transaction_ids)
+            else:
+                self.__catch_up(connection)
+            self.__transaction_ids = transaction_ids
+
+    def apply(self, changes: list):
+        """
+        Apply (model, id, values) changes of committed sessions on the built index
+        """
+        with self.__lock:
+            if not self.is_built():
+                return
+            for model, id_, values in changes:
+                self.update(model, id_, values)
+
+    def update(self, model, id_: int, values: (tuple, None)):
+        """
+        Update the indexed texts of a row, or remove the row when values is None
+        """
+        with self.__lock:
+            texts = self.__texts[model]
+            postings = self.__postings[model]
+
+            for trigram in self.__get_trigrams_of_texts(texts.pop(id_, ())):
+                ids = postings[trigram]
+                ids.discard(id_)
+                if not ids:
+                    del postings[trigram]
+
+            if values is not None:
+                texts[id_] = tuple(normalize_text(value) for value in values if value)
+                for trigram in self.__get_trigrams_of_texts(texts[id_]):
+                    postings.setdefault(trigram, set()).add(id_)
+
+    def find(self, model, expression: str) -> (list, None):
+        """
+        Get the sorted ids of rows which contain the expression case- and accent-insensitively, or None on
+        expressions shorter than a trigram
+
+        The candidates are the intersection of posting lists of trigrams in the expression, and these are checked
+        for the expression outside of the lock.
+        """
+        expression = normalize_text(expression)
+        trigrams = self.get_trigrams(expression)
+        if not trigrams:
+            return None
+        with self.__lock:
+            texts = self.__texts[model]
+            postings = sorted((self.__postings[model].get(trigram, set()) for trigram in trigrams), key=len)
+            candidates = [(id_, texts[id_]) for id_ in postings[0].intersection(*postings[1:])]
+        return sorted(id_ for id_, row_texts in candidates if any(expression in text for text in row_texts))
+
+    def __build(self, connection: Connection, transaction_ids: tuple):
+        for model, column_names in self.COLUMNS.items():
+            self.__texts[model].clear()
+            self.__postings[model].clear()
+            model_table = model.__table__
+            for row in connection.execute(select([model_table.c.id] +
+                                                 [model_table.c[name] for name in column_names])):
+                self.update(model, row[0], tuple(row[1:]))
+        for model, transaction_id in zip(_SEARCHED_MODELS, transaction_ids):
+            self.__applied_transaction_ids[model] = {
+                row.transaction_id for row in self.__get_recent_versions(connection, model, transaction_id)}
+
+    def __catch_up(self, connection: Connection):
+        for model, transaction_id in zip(_SEARCHED_MODELS, self.__transaction_ids):
+            versions = self.__get_recent_versions(connection, model, transaction_id)
+            applied_transaction_ids = self.__applied_transaction_ids[model]
+            changed_ids = {row.id for row in versions if row.transaction_id not in applied_transaction_ids}
+            for row in versions:
+                if row.id in changed_ids:
+                    self.update(model, row.id, None if row.operation_type == Operation.DELETE else
+                                tuple(row[name] for name in self.COLUMNS[model]))
+            self.__applied_transaction_ids[model] = {row.transaction_id for row in versions}
+
+    def __get_recent_versions(self, connection: Connection, model, transaction_id: int) -> list:
+        """
+        Get the versions of rows in order of transactions from the window before the given transaction id
+        """
+        version_table = version_class(model).__table__
+        return connection.execute(
+            select([version_table.c.id, version_table.c.transaction_id, version_table.c.operation_type] +
+                   [version_table.c[name] for name in self.COLUMNS[model]]).
+            where(version_table.c.transaction_id > transaction_id - self.__TRANSACTION_ID_WINDOW).
+            order_by(version_table.c.transaction_id)
+        ).fetchall()
+
+    @staticmethod
+    def __get_trigrams_of_texts(texts: tuple) -> set:
+        return set(chain.from_iterable(TrigramIndex.get_trigrams(text) for text in texts))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session: Session, flush_context):
+    changes = session.info.setdefault('item_search_changes', [])
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, _RESULT_MODELS):
+            session.info['item_search_results_changed'] = True
+        column_names = TrigramIndex.COLUMNS.get(type(instance))
+        if column_names is None:
+            continue
+        values = None if instance in session.deleted else tuple(getattr(instance, name) for name in column_names)
+        changes.append((type(instance), instance.id, values))
+    if session.info.get('item_search_results_changed'):
+        ItemSearch.cache.clear()
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session: Session):
+    changes = session.info.pop('item_search_changes', None)
+    if changes:
+        TrigramIndex.get(str(session.get_bind().url)).apply(changes)
+    if session.info.pop('item_search_results_changed', False):
+        ItemSearch.cache.clear()
+        ItemSearch.increment_generation()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session: Session):
+    session.info.pop('item_search_changes', None)
+    session.info.pop('item_search_results_changed', None)
+
+
+class ItemSearch:
+    """
+    Search in barcodes and items (by name and article number)
+
+    The words of the expression are matched as prefixes in the full-text index and the results are ordered by
+    relevance. Without full-text index it looks for the substring by the trigram index (when that is enabled by
+    ITEM_SEARCH_TRIGRAM_INDEX config), otherwise it scans the tables for the substring.
+
+    The get_*_query methods give queries of result rows (with the columns of both types of results), and these are
+    fetched together by find method.
+
+    The cache is for the results of searches; it is cleared when barcodes, items, units or vendors are changed in this
+    process. The keys contain a generation what is incremented by these commits, and a state of the version tables
+    what follows the changes of other processes; that is queried once per ITEM_SEARCH_CACHE_CHECK_INTERVAL only.
+    """
+    BARCODE = 'barcode'
+    ITEM = 'item'
+
+    cache = LruCache(max_size=config.App.ITEM_SEARCH_CACHE_SIZE)
+
+    __ID_CHUNK_SIZE = 500
+    __WORD = re.compile(r'\w+')
+    __ITEM_FTS = table('item_fts', column('rowid'), column('rank'), column('item_fts'))
+    __BARCODE_FTS = table('barcode_fts', column('rowid'), column('rank'), column('barcode_fts'))
+    __FULL_TEXT_INDEX_RECHECK_INTERVAL = 60.0
+    __full_text_index_availability = {}
+    __generation = 0
+    __version_state = (None, None)
+    __version_state_lock = threading.Lock()
+
+    @classmethod
+    def reset(cls):
+        """
+        Forget the state of indexes (e.g. when the tables are dropped)
+        """
+        cls.__full_text_index_availability.clear()
+        cls.cache.clear()
+        cls.increment_generation()
+        TrigramIndex.reset()
+
+    @classmethod
+    def increment_generation(cls):
+        """
+        Invalidate the cache keys (e.g. after a commit what changed the searched data)
+        """
+        with cls.__version_state_lock:
+            cls.__generation += 1
+            cls.__version_state = (None, None)
+
+    @classmethod
+    def get_cache_version(cls, connection: Connection) -> tuple:
+        """
+        Get the version of the searched data for the keys of the cache
+
+        The version tables are checked at most once per interval (for the changes of other processes).
+        """
+        with cls.__version_state_lock:
+            generation = cls.__generation
+            version_state, checked_at = cls.__version_state
+        if checked_at is not None and time.monotonic() - checked_at < config.App.ITEM_SEARCH_CACHE_CHECK_INTERVAL:
+            return generation, version_state
+
+        checked_at = time.monotonic()
+        version_state = tuple(connection.execute(_VERSION_STATE_QUERY).first())
+        with cls.__version_state_lock:
+            if cls.__generation == generation:
+                cls.__version_state = (version_state, checked_at)
+        return generation, version_state
+
+    def __init__(self, session: Session):
+        self.__session = session
+        self.__trigram_index = None
+        self.__next_chunks = {}
+
+    def find(self, queries: list, limit: int) -> list:
+        """
+        Get the first results of queries in order of types (barcodes before items) by one query
+
+        A query of ids found by the trigram index covers the first chunk of the ids only; the next chunks are queried
+        while their rows could get into the first results (by the limit and the order of types), until the ids run out.
+        """
+        if not queries:
+            return []
+
+        results = self.__find_once(queries, limit)
+        queries = self.__get_next_chunk_queries(queries, results, limit)
+        if not queries:
+            return results
+        while queries:
+            results = sorted(results + self.__find_once(queries, limit),
+                             key=lambda row: (row.type, row.sort_number, row.sort_text))[:limit]
+            queries = self.__get_next_chunk_queries(queries, results, limit)
+        return results
+
+    def get_barcodes_query(self, expression: str) -> Query:
+        """
+        Get query of barcodes
+        """
+        match_query = self.__get_match_query(expression)
+        if match_query is not None:
+            return self.__query_barcodes(self.__BARCODE_FTS.c.rank).join(
+                self.__BARCODE_FTS, self.__BARCODE_FTS.c.rowid == Barcode.id
+            ).filter(self.__BARCODE_FTS.c.barcode_fts.match(match_query)).order_by(self.__BARCODE_FTS.c.rank)
+
+        query = self.__query_barcodes(Barcode.id).order_by(Barcode.id)
+        ids = self.__find_in_trigram_index(Barcode, expression)
+        if ids is not None:
+            return self.__get_chunked_query(self.BARCODE, query, Barcode.id, ids)
+        return query.filter(Barcode.barcode.ilike('%{}%'.format(expression)))
+
+    def get_barcode_query(self, barcode: str) -> Query:
+        """
+        Get query of barcode by exact match
+        """
+        return self.__query_barcodes(Barcode.id).filter(Barcode.barcode == barcode)
+
+    def get_barcodes_by_prefix_query(self, prefix: str) -> Query:
+        """
+        Get query of barcodes starting with prefix in order of barcodes (by the index of barcodes)
+        """
+        return self.__query_barcodes(literal(0), Barcode.barcode).filter(
+            get_prefix_criterion(Barcode.barcode, prefix)
+        ).order_by(Barcode.barcode)
+
+    def get_items_query(self, expression: str) -> Query:
+        """
+        Get query of items with their master barcodes
+        """
+        match_query = self.__get_match_query(expression)
+        if match_query is not None:
+            return self.__query_items(self.__ITEM_FTS.c.rank).join(
+                self.__ITEM_FTS, self.__ITEM_FTS.c.rowid == Item.id
+            ).filter(self.__ITEM_FTS.c.item_fts.match(match_query)).order_by(self.__ITEM_FTS.c.rank)
+
+        query = self.__query_items(Item.id).order_by(Item.id)
+        ids = self.__find_in_trigram_index(Item, expression)
+        if ids is not None:
+            return self.__get_chunked_query(self.ITEM, query, Item.id, ids)
+        normalized_expression = normalize_text(expression)
+        return query.filter(or_(Item.normalized_name.like('%{}%'.format(normalized_expression)),
+                                Item.normalized_article_number.like('%{}%'.format(normalized_expression))))
+
+    def __find_once(self, queries: list, limit: int) -> list:
+        selects = [select([query.limit(limit).subquery()]) for query in queries]
+        results = (union_all(*selects) if len(selects) > 1 else selects[0]).alias()
+        return self.__session.execute(
+            select([results]).order_by(results.c.type, results.c.sort_number, results.c.sort_text).limit(limit)
+        ).fetchall()
+
+    def __get_next_chunk_queries(self, queries: list, results: list, limit: int) -> list:
+        """
+        Get queries of the next chunks of ids for the chunked queries whose next rows could get into the results
+
+        The rows of a chunk follow the rows of the former chunks of their type (by id), so these could get into the
+        ordered results only when the results are not full, or the last result is of a later type.
+        """
+        next_queries = []
+        for query in queries:
+            next_chunk = self.__next_chunks.pop(query, None)
+            if next_chunk is not None and (len(results) < limit or next_chunk[0] < results[-1].type):
+                next_queries.append(self.__get_chunked_query(*next_chunk))
+        return next_queries
+
+    def __query_barcodes(self, sort_number, sort_text=literal('')) -> Query:
+        return self.__session.query(
+            literal(self.BARCODE).label('type'), sort_number.label('sort_number'), sort_text.label('sort_text'),
+            Barcode.item_id.label('item_id'), Item.name.label('name'), Unit.unit.label('unit'),
+            Barcode.barcode.label('barcode'), Barcode.quantity.label('quantity'),
+            cast(null(), String).label('article_number'), cast(null(), String).label('vendor'),
+        ).select_from(Barcode).join(Item, Barcode.item_id == Item.id).join(Unit, Item.unit_id == Unit.id)
+
+    def __query_items(self, sort_number, sort_text=literal('')) -> Query:
+        return self.__session.query(
+            literal(self.ITEM).label('type'), sort_number.label('sort_number'), sort_text.label('sort_text'),
+            Item.id.label('item_id'), Item.name.label('name'), Unit.unit.label('unit'),
+            Barcode.barcode.label('barcode'), cast(null(), Float).label('quantity'),
+            Item.article_number.label('article_number'), Vendor.name.label('vendor'),
+        ).select_from(Item).join(Barcode, Barcode.item_id == Item.id).join(Unit, Item.unit_id == Unit.id).join(
+            Vendor, Item.vendor_id == Vendor.id
+        ).filter(Barcode.master)
+
+    def __get_chunked_query(self, type_: str, query: Query, id_column, ids: list, offset: int=0) -> Query:
+        """
+        Get query of a chunk of ids found by the trigram index; the next chunk is kept for find (its query is made
+        only when that is needed)
+        """
+        if not ids:
+            return query.filter(false())
+        chunk_query = query.filter(id_column.in_(ids[offset:offset + self.__ID_CHUNK_SIZE]))
+        if offset + self.__ID_CHUNK_SIZE < len(ids):
+            self.__next_chunks[chunk_query] = (type_, query, id_column, ids, offset + self.__ID_CHUNK_SIZE)
+        return chunk_query
+
+    def __get_match_query(self, expression: str) -> (str, None):
+        """
+        Get FTS5 query what matches all words of the expression as prefixes, or None when that can not be used
+        """
+        words = self.__WORD.findall(expression)
+        if not words or not self.__is_full_text_index_available():
+            return None
+        return ' '.join('"{}"*'.format(word) for word in words)
+
+    def __find_in_trigram_index(self, model, expression: str) -> (list, None):
+        """
+        Get the sorted ids of matching rows by the trigram index, or None when that can not be used (also on
+        expressions shorter than a trigram)
+        """
+        if not config.App.ITEM_SEARCH_TRIGRAM_INDEX or self.__is_full_text_index_available():
+            return None
+        if self.__trigram_index is None:
+            self.__trigram_index = TrigramIndex.get(str(self.__session.get_bind().url))
+            self.__trigram_index.synchronize(self.__session.connection())
+        return self.__trigram_index.find(model, expression)
+
+    def __is_full_text_index_available(self) -> bool:
+        """
+        Check the full-text index of the database; a missing index is checked again after an interval (e.g. it can be
+        created by an upgrade of the database meanwhile)
+        """
+        bind = self.__session.get_bind()
+        url = str(bind.url)
+        available, checked_at = self.__full_text_index_availability.get(url, (False, None))
+        if not available and (checked_at is None or
+                              time.monotonic() - checked_at >= self.__FULL_TEXT_INDEX_RECHECK_INTERVAL):
+            with bind.connect() as connection:
+                available = FullTextIndex.is_created(connection)
+            self.__full_text_index_availability[url] = (available, time.monotonic())
+        return available
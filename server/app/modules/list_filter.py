@@ -0,0 +1,104 @@
+from flask.ext.restful import abort
+from sqlalchemy import and_, not_, select, true
+
+
+class ListFilter:
+    """
+    Whitelisted filter of a list view by a query argument
+
+    The argument is converted to the given type, and the criterion is made from that.
+
+    Example:
+    >>> class ItemListView(BaseView):
+    ...     _filters = {
+    ...         'vendor_id': ListFilter(int, lambda value: Item.vendor_id == value),
+    ...     }
+    """
+    def __init__(self, argument_type: type, get_criterion: callable):
+        self.argument_type = argument_type
+        self.__get_criterion = get_criterion
+
+    def get_criterion(self, name: str, value) -> 'SQL expression':
+        return self.__get_criterion(value)
+
+
+class FlagFilter(ListFilter):
+    """
+    Filter by a condition (``1``) or by the opposite of that (``0``)
+
+    Example:
+    >>> class WorkListView(BaseView):
+    ...     _filters = {
+    ...         'open': FlagFilter(Work.returned_close_user_id.is_(None)),
+    ...     }
+    """
+    def __init__(self, criterion: 'SQL expression'):
+        super().__init__(int, None)
+        self.__criterion = criterion
+
+    def get_criterion(self, name: str, value: int) -> 'SQL expression':
+        if value not in (0, 1):
+            abort(422, message={name: ['Must be 0 or 1.']})
+        return self.__criterion if value == 1 else not_(self.__criterion)
+
+
+class PrefixFilter(ListFilter):
+    """
+    Filter for values of a column starting with the argument (optionally normalized before by the given function)
+
+    The column of a related model can be filtered through a foreign key (by a sub-query of matching ids).
+
+    Example:
+    >>> class VendorListView(BaseView):
+    ...     _filters = {
+    ...         'q': PrefixFilter(Vendor.normalized_name, normalize_text),
+    ...     }
+    >>> class WorkItemListView(BaseView):
+    ...     _filters = {
+    ...         'location_prefix': PrefixFilter(Item.location, foreign_key=WorkItem.item_id),
+    ...     }
+    """
+    def __init__(self, column, normalize: (callable, None)=None, foreign_key=None):
+        super().__init__(str, None)
+        self.__column = column
+        self.__normalize = normalize
+        self.__foreign_key = foreign_key
+
+    def get_criterion(self, name: str, value: str) -> 'SQL expression':
+        if self.__normalize is not None:
+            value = self.__normalize(value)
+        criterion = get_prefix_criterion(self.__column, value)
+        if self.__foreign_key is None:
+            return criterion
+
+        return self.__foreign_key.in_(select([_get_referred_column(self.__foreign_key)]).where(criterion))
+
+
+def get_prefix_criterion(column, prefix: str) -> 'SQL expression':
+    """
+    Get criterion of values of column starting with prefix
+
+    The prefix is looked up as a range (e.g. 'SK0012' <= value < 'SK0013') for using the index of column on every
+    database backend.
+    """
+    if not prefix:
+        return true()
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper_bound, column.startswith(prefix))
+
+
+def get_related_value(column, foreign_key) -> 'SQL expression':
+    """
+    Get value of a column of the related model through a foreign key (by a correlated sub-query), e.g. for sorting
+
+    Example:
+    >>> class WorkItemListView(BaseView):
+    ...     _sorts = {
+    ...         'location': get_related_value(Item.location_sort_key, WorkItem.item_id),
+    ...     }
+    """
+    return select([column]).where(_get_referred_column(foreign_key) == foreign_key).as_scalar()
+
+
+def _get_referred_column(foreign_key) -> 'Column':
+    return next(iter(foreign_key.property.columns[0].foreign_keys)).column
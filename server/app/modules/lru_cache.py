@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+
+class LruCache:
+    """
+    Thread-safe cache what keeps the least recently used values up to max size
+
+    The hits and misses of get are counted for sizing the cache. The cache is disabled when max size is zero.
+
+    Example usage:
+    >>> cache = LruCache(max_size=2)
+    >>> cache.set('apple', 1)
+    >>> cache.get('apple')
+    1
+    """
+
+    def __init__(self, max_size: int):
+        self.__max_size = max_size
+        self.__values = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    def get(self, key, default=None):
+        with self.__lock:
+            if key not in self.__values.keys():
+                self.__misses += 1
+                return default
+            self.__hits += 1
+            self.__values.move_to_end(key)
+            return self.__values[key]
+
+    def set(self, key, value):
+        if not self.__max_size:
+            return
+        with self.__lock:
+            self.__values[key] = value
+            self.__values.move_to_end(key)
+            while len(self.__values) > self.__max_size:
+                self.__values.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__values.clear()
+
+    def get_statistics(self) -> dict:
+        with self.__lock:
+            return {
+                'max_size': self.__max_size,
+                'size': len(self.__values),
+                'hits': self.__hits,
+                'misses': self.__misses,
+            }
@@ -1,43 +1,113 @@
+import copy
 import json
 import fcntl
+import os
 import os.path
+import sqlite3
+import tempfile
+import threading
 
 from app import persistent_storage_dir
+from app.server import config
 
 
 class PersistentStorage:
     """
     Simple persistent storage
 
-    Use persistent storage context for handle data with proper locking. The storage going to read the persist file when
-    enter to the context, and going to save changes when leave it.
+    Use persistent storage context for handle data with proper locking. The storage going to read the persist data when
+    enter to the context, and going to save changes when leave it (the changes are dropped when the context is left by
+    an exception). The read-only contexts do not block each other.
+
+    The data are kept by a backend (``App.PERSISTENT_STORAGE_BACKEND`` in config): a JSON file per name (``json``) or a
+    table of an SQLite database (``sqlite``).
 
     Example usage:
     >>> with PersistentStorage(name='fruits') as storage:
     ...     bar_value = storage.get('orange', default=12)
     ...     storage.set('apple', 20)
+    ...     storage.incr('pear')
+    1
+    >>> with PersistentStorage(name='fruits', read_only=True) as storage:
+    ...     storage.get('apple')
+    20
     """
 
-    def __init__(self, name: str= 'common'):
-        self.__storage_dir_path = persistent_storage_dir
+    def __init__(self, name: str= 'common', read_only: bool=False, backend: (str, None)=None):
+        backend_class = _BACKENDS[backend or config.App.PERSISTENT_STORAGE_BACKEND]
+        self.__backend = backend_class(persistent_storage_dir, name, read_only)
+        self.__read_only = read_only
+
+        self.__prepare_directory()
+
+    def __enter__(self) -> 'PersistentStorage':
+        self.__backend.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.__backend.close(failed=exc_type is not None)
+
+    def get(self, name: str, default=None):
+        return self.__backend.get(name, default)
+
+    def set(self, name: str, value):
+        self.__check_writable()
+        self.__backend.set(name, value)
+
+    def delete(self, name: str):
+        self.__check_writable()
+        self.__backend.delete(name)
+
+    def incr(self, name: str, amount: int=1) -> int:
+        """
+        Increment a counter (from 0) atomically, and get its new value
+        """
+        self.__check_writable()
+        return self.__backend.incr(name, amount)
+
+    def __check_writable(self):
+        if self.__read_only:
+            raise RuntimeError('Can not change read-only persistent storage.')
+
+    def __prepare_directory(self):
+        if not os.path.exists(persistent_storage_dir):
+            os.makedirs(persistent_storage_dir)
+
+
+class JsonFileBackend:
+    """
+    Backend of persistent storage what keeps the data of a name in a JSON file
+
+    The read-only contexts hold a shared lock, so readers do not wait for each other. The locks are taken by flock on
+    a file opened by the context, so they exclude the other threads of the process too (unlike lockf). The parsed
+    data are cached in the process, and the file is parsed again only when its modification time, inode or size has
+    been changed. The changes are saved to a temporary file what replaces the persist file, so a crash can not leave a
+    half written file behind.
+    """
+
+    __cache = {}
+    __cache_lock = threading.Lock()
+
+    def __init__(self, storage_dir_path: str, name: str, read_only: bool):
+        self.__storage_dir_path = storage_dir_path
         self.__json_file_path = os.path.join(self.__storage_dir_path, '{}.json'.format(name))
         self.__lock_file_path = os.path.join(self.__storage_dir_path, '{}.json.lck'.format(name))
         self.__lock_fd = None
+        self.__read_only = read_only
 
         self.__storage = {}
         self.__dirty = False
 
-        self.__prepare_directory()
-
-    def __enter__(self) -> 'PersistentStorage':
+    def open(self):
         self.__hold_lock()
         self.__load()
-        return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.__dirty:
-            self.__save()
-        self.__release_lock()
+    def close(self, failed: bool=False):
+        try:
+            if self.__dirty and not failed:
+                self.__save()
+        finally:
+            self.__release_lock()
 
     def get(self, name: str, default=None):
         return self.__storage.get(name, default)
@@ -46,28 +116,156 @@ class PersistentStorage:
         self.__storage[name] = value
         self.__dirty = True
 
-    def __prepare_directory(self):
-        if not os.path.exists(self.__storage_dir_path):
-            os.makedirs(self.__storage_dir_path)
+    def delete(self, name: str):
+        if name in self.__storage.keys():
+            del self.__storage[name]
+            self.__dirty = True
+
+    def incr(self, name: str, amount: int) -> int:
+        value = self.__storage.get(name, 0) + amount
+        self.set(name, value)
+        return value
 
     def __load(self):
+        storage = self.__get_cached_storage()
+        # the cached data are shared by the read-only contexts only
+        self.__storage = storage if self.__read_only else copy.deepcopy(storage)
+        self.__dirty = False
+
+    def __get_cached_storage(self) -> dict:
         try:
-            with open(self.__json_file_path, 'r') as fd:
-                self.__storage = json.load(fd)
+            version = self.__get_version(os.stat(self.__json_file_path))
         except FileNotFoundError:
-            self.__storage = {}
-        self.__dirty = False
+            return {}
+
+        with JsonFileBackend.__cache_lock:
+            cached_version, storage = JsonFileBackend.__cache.get(self.__json_file_path, (None, None))
+        if cached_version == version:
+            return storage
+
+        with open(self.__json_file_path, 'r') as fd:
+            storage = json.load(fd)
+            version = self.__get_version(os.fstat(fd.fileno()))
+        self.__set_cached_storage(version, storage)
+        return storage
+
+    def __set_cached_storage(self, version: tuple, storage: dict):
+        with JsonFileBackend.__cache_lock:
+            JsonFileBackend.__cache[self.__json_file_path] = (version, storage)
 
     def __save(self):
-        with open(self.__json_file_path, 'w') as fd:
-            json.dump(self.__storage, fd)
+        fd, temp_file_path = tempfile.mkstemp(prefix='.{}.'.format(os.path.basename(self.__json_file_path)),
+                                              dir=self.__storage_dir_path)
+        try:
+            os.fchmod(fd, self.__get_file_mode())
+            with os.fdopen(fd, 'w') as temp_file:
+                json.dump(self.__storage, temp_file)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+                version = self.__get_version(os.fstat(temp_file.fileno()))
+            os.replace(temp_file_path, self.__json_file_path)
+        finally:
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+        self.__sync_directory()
+
+        self.__set_cached_storage(version, copy.deepcopy(self.__storage))
         self.__dirty = False
 
+    def __get_file_mode(self) -> int:
+        try:
+            return os.stat(self.__json_file_path).st_mode & 0o777
+        except FileNotFoundError:
+            return 0o644
+
+    def __sync_directory(self):
+        directory_fd = os.open(self.__storage_dir_path, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
     def __hold_lock(self):
-        self.__lock_fd = open(self.__lock_file_path, 'a')
-        fcntl.lockf(self.__lock_fd.fileno(), fcntl.LOCK_EX)
+        self.__lock_fd = open(self.__lock_file_path, 'a+')
+        fcntl.flock(self.__lock_fd.fileno(), fcntl.LOCK_SH if self.__read_only else fcntl.LOCK_EX)
 
     def __release_lock(self):
-        fcntl.lockf(self.__lock_fd.fileno(), fcntl.LOCK_UN)
+        fcntl.flock(self.__lock_fd.fileno(), fcntl.LOCK_UN)
         self.__lock_fd.close()
         self.__lock_fd = None
+
+    @staticmethod
+    def __get_version(stat: os.stat_result) -> tuple:
+        return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+
+class SqliteBackend:
+    """
+    Backend of persistent storage what keeps the values as rows of a key-value table of an SQLite database
+
+    The database is in WAL mode, so readers do not wait for the writer. A writable context is one transaction what
+    holds the write lock of the database from its start (``BEGIN IMMEDIATE``), and the values are read and written one
+    by one, so the cost of a change does not grow with the count of keys. The counters are incremented by one
+    statement (it requires SQLite 3.24 or newer).
+    """
+    DATABASE_FILE_NAME = 'persistent_storage.sqlite'
+    __TIMEOUT = 30
+
+    __prepared_database_paths = set()
+    __prepared_database_paths_lock = threading.Lock()
+
+    def __init__(self, storage_dir_path: str, name: str, read_only: bool):
+        self.__database_path = os.path.join(storage_dir_path, self.DATABASE_FILE_NAME)
+        self.__name = name
+        self.__read_only = read_only
+        self.__connection = None
+
+    def open(self):
+        self.__connection = sqlite3.connect(self.__database_path, timeout=self.__TIMEOUT, isolation_level=None)
+        try:
+            self.__prepare_database()
+            self.__connection.execute('BEGIN' if self.__read_only else 'BEGIN IMMEDIATE')
+        except sqlite3.Error:
+            self.__connection.close()
+            raise
+
+    def close(self, failed: bool=False):
+        try:
+            self.__connection.execute('ROLLBACK' if failed else 'COMMIT')
+        finally:
+            self.__connection.close()
+            self.__connection = None
+
+    def get(self, name: str, default=None):
+        row = self.__connection.execute('SELECT value FROM storage WHERE namespace = ? AND key = ?',
+                                        (self.__name, name)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, name: str, value):
+        self.__connection.execute('INSERT OR REPLACE INTO storage (namespace, key, value) VALUES (?, ?, ?)',
+                                  (self.__name, name, json.dumps(value)))
+
+    def delete(self, name: str):
+        self.__connection.execute('DELETE FROM storage WHERE namespace = ? AND key = ?', (self.__name, name))
+
+    def incr(self, name: str, amount: int) -> int:
+        self.__connection.execute('INSERT INTO storage (namespace, key, value) VALUES (?, ?, ?) '
+                                  'ON CONFLICT (namespace, key) DO UPDATE SET value = CAST(value AS INTEGER) + ?',
+                                  (self.__name, name, json.dumps(amount), amount))
+        return self.get(name)
+
+    def __prepare_database(self):
+        with SqliteBackend.__prepared_database_paths_lock:
+            if self.__database_path in SqliteBackend.__prepared_database_paths:
+                return
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('CREATE TABLE IF NOT EXISTS storage ('
+                                      'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                                      'PRIMARY KEY (namespace, key))')
+            SqliteBackend.__prepared_database_paths.add(self.__database_path)
+
+
+_BACKENDS = {
+    'json': JsonFileBackend,
+    'sqlite': SqliteBackend,
+}
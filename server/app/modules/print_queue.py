@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.server import app
+from app.modules.label_printer import LabelPrinter
+from app.modules.persistent_storage import PersistentStorage
+from app.modules.printer import TransientPrinterError
+
+
+class PrintQueue:
+    """
+    Queue of label printing by a pool of background threads (per process)
+
+    The jobs get ids what are unique across processes, and their status is kept in persistent storage, so any process
+    can report the progress. The transient errors of CUPS are retried after a delay what doubles by every attempt, and
+    the retried job continues by the not printed copies. The count of printed copies is saved at most once per progress
+    interval while printing. The status of the last jobs is kept only.
+
+    Example usage:
+    >>> print_queue = PrintQueue(worker_count=2, retry_count=3, retry_delay=2.0, kept_job_count=100)
+    >>> print_queue.submit(LabelPrinter(title='Spray', data='SK642031'), copies=3)
+    {'id': 1, 'status': 'queued', 'copies': 3, 'printed_copies': 0, 'attempts': 0, 'error': None}
+    >>> print_queue.get_job(1)['status']
+    'printing'
+    """
+    QUEUED = 'queued'
+    PRINTING = 'printing'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    __storage_name = 'print_jobs'
+    __progress_interval = 1.0
+    __last_id_name = 'last_id'
+
+    def __init__(self, worker_count: int, retry_count: int, retry_delay: float, kept_job_count: int,
+                 one_label_per_job: bool=False):
+        self.__worker_count = worker_count
+        self.__retry_count = retry_count
+        self.__retry_delay = retry_delay
+        self.__kept_job_count = kept_job_count
+        self.__one_label_per_job = one_label_per_job
+
+        self.__executor = None
+        self.__executor_pid = None
+        self.__lock = threading.Lock()
+
+    def submit(self, label_printer: LabelPrinter, copies: int=1) -> dict:
+        with PersistentStorage(self.__storage_name) as storage:
+            job_id = storage.incr(self.__last_id_name)
+            job = {'id': job_id, 'status': self.QUEUED, 'copies': copies, 'printed_copies': 0, 'attempts': 0,
+                   'error': None}
+            storage.set(str(job_id), job)
+            storage.delete(str(job_id - self.__kept_job_count))
+
+        self.__get_executor().submit(self.__run, job_id, label_printer, copies)
+        return job
+
+    def get_job(self, job_id: int) -> (dict, None):
+        with PersistentStorage(self.__storage_name, read_only=True) as storage:
+            return storage.get(str(job_id))
+
+    def __get_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the pool of worker threads of the current process (the threads do not survive a fork)
+        """
+        with self.__lock:
+            if self.__executor_pid != os.getpid():
+                self.__executor = ThreadPoolExecutor(max_workers=self.__worker_count)
+                self.__executor_pid = os.getpid()
+            return self.__executor
+
+    def __run(self, job_id: int, label_printer: LabelPrinter, copies: int):
+        try:
+            printed_copies = self.__print(job_id, label_printer, copies)
+        except Exception as e:
+            app.logger.exception('Print job {!s} failed'.format(job_id))
+            self.__update_job(job_id, status=self.FAILED, error=str(e))
+        else:
+            self.__update_job(job_id, status=self.DONE, printed_copies=printed_copies, error=None)
+
+    def __print(self, job_id: int, label_printer: LabelPrinter, copies: int) -> int:
+        printed_copies = 0
+        for attempt in range(1, self.__retry_count + 2):
+            self.__update_job(job_id, status=self.PRINTING, attempts=attempt)
+            progress_saved_at = time.monotonic()
+            try:
+                while printed_copies < copies:
+                    copies_of_cups_job = 1 if self.__one_label_per_job else copies - printed_copies
+                    label_printer.print(copies=copies_of_cups_job)
+                    printed_copies += copies_of_cups_job
+                    if time.monotonic() - progress_saved_at >= self.__progress_interval:
+                        self.__update_job(job_id, printed_copies=printed_copies)
+                        progress_saved_at = time.monotonic()
+                return printed_copies
+            except TransientPrinterError as e:
+                if attempt > self.__retry_count:
+                    self.__update_job(job_id, printed_copies=printed_copies)
+                    raise
+                app.logger.warning('Print job {!s} is retried; {!s}'.format(job_id, e))
+                self.__update_job(job_id, printed_copies=printed_copies, error=str(e))
+                time.sleep(self.__retry_delay * 2 ** (attempt - 1))
+
+    def __update_job(self, job_id: int, **changes):
+        with PersistentStorage(self.__storage_name) as storage:
+            job = storage.get(str(job_id))
+            if job is None:
+                return
+            job.update(changes)
+            storage.set(str(job_id), job)
@@ -17,6 +17,13 @@ class MissingPrinter(Exception):
     pass
 
 
+class TransientPrinterError(Exception):
+    """
+    Temporary error of CUPS (e.g. the server is not reachable or the printer is busy); the printing can be retried
+    """
+    pass
+
+
 class Printer:
     DEFAULT_PRINTER = 'DEFAULT'
 
@@ -34,11 +41,21 @@ class Printer:
         # 'BrMargin': '3'
     }
 
-    def __init__(self, name: str=DEFAULT_PRINTER):
+    # server-error-internal, -service-unavailable, -device-error, -temporary-error, -not-accepting-jobs and -busy
+    __TRANSIENT_IPP_STATUSES = {0x0500, 0x0502, 0x0504, 0x0505, 0x0506, 0x0507}
+
+    @staticmethod
+    def check_cups():
         if 'cups' not in globals().keys():
             raise MissingCups('Can not print while \'pycups\' python3 module is not installed.')
 
-        self.__cups_connection = cups.Connection()
+    def __init__(self, name: str=DEFAULT_PRINTER):
+        self.check_cups()
+
+        try:
+            self.__cups_connection = cups.Connection()
+        except RuntimeError as e:
+            raise TransientPrinterError('Can not connect to CUPS; {!s}'.format(e))
         self.__printer_name = self.__evaluate_printer_name(name)
 
     def print_pdf(self, pdf_path: str, options: (dict, None)=None) -> 'Printer':
@@ -53,7 +70,14 @@ class Printer:
             printer=self.__printer_name,
             options=current_options
         ))
-        self.__cups_connection.printFile(self.__printer_name, pdf_path, job_title, current_options)
+        try:
+            self.__cups_connection.printFile(self.__printer_name, pdf_path, job_title, current_options)
+        except cups.IPPError as e:
+            if e.args[0] not in self.__TRANSIENT_IPP_STATUSES:
+                raise
+            raise TransientPrinterError('Can not print now; {!s}'.format(e.args[1]))
+        except cups.HTTPError as e:
+            raise TransientPrinterError('Can not print now; HTTP status {!s}'.format(e.args[0]))
 
         return self
 
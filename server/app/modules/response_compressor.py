@@ -0,0 +1,95 @@
+import gzip
+import os.path
+import zlib
+from flask import Flask, request, Response, safe_join
+
+
+class ResponseCompressor:
+    """
+    Compress the responses by gzip or deflate, what the client accepts (``Accept-Encoding`` request header)
+
+    The responses smaller than ``min_size`` bytes, the streamed and the not compressible ones are sent as is. The
+    compressed static files are cached in memory until their modification, or the precompressed ``<file>.gz`` is used
+    when it is newer than the original file.
+
+    Example:
+    >>> ResponseCompressor(app, level=6, min_size=500)
+    """
+    COMPRESSIBLE_MIMETYPES = frozenset(['application/json', 'application/javascript', 'text/javascript', 'text/html',
+                                        'text/css', 'text/plain', 'text/xml', 'image/svg+xml'])
+    ENCODINGS = ('gzip', 'deflate')
+
+    def __init__(self, app: Flask, level: int=6, min_size: int=500):
+        self.__app = app
+        self.__level = level
+        self.__min_size = min_size
+        self.__static_cache = {}
+
+        app.after_request(self.__compress_response)
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == 'gzip':
+            return gzip.compress(data, compresslevel=self.__level)
+        return zlib.compress(data, self.__level)
+
+    def __compress_response(self, response: Response) -> Response:
+        if response.mimetype not in self.COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if not 200 <= response.status_code < 300 or response.status_code in (204, 206) or \
+                'Content-Encoding' in response.headers:
+            return response
+
+        encoding = request.accept_encodings.best_match(self.ENCODINGS)
+        if encoding is None:
+            return response
+
+        if response.direct_passthrough:
+            static_path = self.__get_static_path()
+            if static_path is None or os.path.getsize(static_path) < self.__min_size:
+                return response
+            data, encoding = self.__get_compressed_static_file(static_path, encoding)
+            response.direct_passthrough = False
+        else:
+            if response.is_streamed:
+                return response
+            data = response.get_data()
+            if len(data) < self.__min_size:
+                return response
+            data = self.compress(data, encoding)
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        etag, is_weak = response.get_etag()
+        if etag and not is_weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def __get_static_path(self) -> (str, None):
+        if request.endpoint != 'static' or self.__app.static_folder is None:
+            return None
+        path = safe_join(self.__app.static_folder, request.view_args['filename'])
+        if not os.path.isfile(path):
+            return None
+        return path
+
+    def __get_compressed_static_file(self, path: str, encoding: str) -> tuple:
+        """
+        Get compressed content and its encoding from the precompressed file or the cache
+        """
+        stat = os.stat(path)
+        precompressed_path = '{}.gz'.format(path)
+        if encoding == 'gzip' and os.path.isfile(precompressed_path) and \
+                os.path.getmtime(precompressed_path) >= stat.st_mtime:
+            with open(precompressed_path, 'rb') as fd:
+                return fd.read(), encoding
+
+        cache_key = (path, encoding)
+        file_version = (stat.st_mtime, stat.st_size)
+        cached_file_version, data = self.__static_cache.get(cache_key, (None, None))
+        if cached_file_version != file_version:
+            with open(path, 'rb') as fd:
+                data = self.compress(fd.read(), encoding)
+            self.__static_cache[cache_key] = (file_version, data)
+        return data, encoding
@@ -1,7 +1,38 @@
+import json
+from flask import Response
 from flask.ext import restful
 
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def dumps_json(data) -> str:
+    """
+    Encode data to compact JSON by the fastest available encoder (ujson or the standard json module)
+    """
+    if ujson is not None:
+        return ujson.dumps(data, escape_forward_slashes=False)
+    return json.dumps(data, separators=(',', ':'))
+
+
+def output_json(data, code: int, headers: (dict, None)=None) -> Response:
+    """
+    Make a JSON response without pretty-printing (not even in debug mode)
+
+    The already encoded data (bytes) are sent as is.
+    """
+    if not isinstance(data, bytes):
+        data = dumps_json(data).encode('utf-8')
+    return Response(data, code, headers, mimetype='application/json')
+
 
 class RestfulApiWithoutSimpleAuth(restful.Api):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.representations = {'application/json': output_json}
+
     def unauthorized(self, response):
         """ Given a response, change it to ask for credentials """
 
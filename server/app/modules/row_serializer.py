@@ -0,0 +1,144 @@
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import aliased, Query, Session
+
+from app.modules.basic_serializer import BasicSerializer, compile_dump, get_datetime_source
+
+
+class RowSerializer:
+    """
+    Serializer of result rows for read-only lists without ORM object hydration
+
+    It selects exactly the columns of a BasicSerializer (nested fields by outer joins), and builds the same dicts from
+    the result rows what the BasicSerializer builds from the model objects.
+
+    Example:
+    >>> class FooListView(BaseView):
+    ...     _model = Foo
+    ...     _serializer = FooSerializer()
+    ...     _row_serializer = RowSerializer(_model, _serializer)
+    """
+    __NESTED_LABEL_SEPARATOR = '__'
+
+    def __init__(self, model, serializer: BasicSerializer):
+        self.__model = model
+        self.__serializer = serializer
+        self.__partials = {}
+
+        self.__columns = []
+        self.__joins = []
+
+        root = self.__add_entity(model, serializer, name=None, label_prefix='')
+        self.__nested_entities = []
+        self.__collect_nested_entities(root)
+
+        self.dump = self.__compile(root.get_full_source())
+        self.__dump_flat = self.__compile(root.get_flat_source())
+        self.__dump_nested = [
+            (entity.name, self.__compile(entity.id_source), self.__compile(entity.get_flat_source()))
+            for entity in self.__nested_entities
+        ]
+
+    def get_query(self, session: Session) -> Query:
+        query = session.query(*self.__columns).select_from(self.__model)
+        for target, relationship in self.__joins:
+            query = query.outerjoin(target, relationship)
+        return query
+
+    def dump_many(self, rows) -> list:
+        return list(map(self.dump, rows))
+
+    def dump_many_included(self, rows) -> dict:
+        """
+        De-duplicate the nested objects like BasicSerializer.dump_many_included()
+        """
+        included = dict((name, {}) for name, _, _ in self.__dump_nested)
+        items = []
+
+        for row in rows:
+            items.append(self.__dump_flat(row))
+            for name, get_id, dump in self.__dump_nested:
+                nested_id = get_id(row)
+                if nested_id is not None and str(nested_id) not in included[name].keys():
+                    included[name][str(nested_id)] = dump(row)
+
+        return {
+            'items': items,
+            'included': dict((name, nested_objects) for name, nested_objects in included.items() if nested_objects),
+        }
+
+    def only(self, names: (list, set, tuple)) -> 'RowSerializer':
+        """
+        Get a row serializer what selects and dumps the selected fields only
+        """
+        names = frozenset(names)
+        if names not in self.__partials:
+            self.__partials[names] = RowSerializer(self.__model, self.__serializer.only(names))
+        return self.__partials[names]
+
+    def __add_entity(self, entity, serializer: BasicSerializer, name: (str, None), label_prefix: str) -> '_Entity':
+        result = _Entity(name)
+
+        for field_name in serializer.fields:
+            result.fields.append((field_name, self.__add_column(entity, field_name, label_prefix)))
+
+        for field_name in serializer.datetime_fields:
+            column_source = self.__add_column(entity, field_name, label_prefix)
+            result.fields.append((field_name, get_datetime_source(column_source, serializer.REST_API_DATE_FORMAT)))
+
+        if 'id' in serializer.fields:
+            result.id_source = dict(result.fields)['id']
+        else:
+            result.id_source = self.__add_column(entity, 'id', label_prefix)
+
+        for field_name, nested_serializer in serializer.nested_fields.items():
+            relationship = inspect(entity).mapper.relationships[field_name]
+            target = aliased(relationship.mapper.class_)
+            self.__joins.append((target, getattr(entity, field_name)))
+
+            nested_label_prefix = '{}{}{}'.format(label_prefix, field_name, self.__NESTED_LABEL_SEPARATOR)
+            nested_entity = self.__add_entity(target, nested_serializer, field_name, nested_label_prefix)
+            nested_entity.is_referable = 'id' in nested_serializer.fields
+            result.nested_entities.append(nested_entity)
+
+        return result
+
+    def __add_column(self, entity, name: str, label_prefix: str) -> str:
+        index = len(self.__columns)
+        self.__columns.append(getattr(entity, name).label('{}{}'.format(label_prefix, name)))
+        return 'row[{}]'.format(index)
+
+    def __collect_nested_entities(self, entity: '_Entity'):
+        for nested_entity in entity.nested_entities:
+            if nested_entity.is_referable:
+                self.__nested_entities.append(nested_entity)
+                self.__collect_nested_entities(nested_entity)
+
+    @staticmethod
+    def __compile(source: str) -> callable:
+        return compile_dump('def dump(row):\n    return {}'.format(source))
+
+
+class _Entity:
+    """
+    Serialized entity of a row; it knows the source codes of its values
+    """
+    def __init__(self, name: (str, None)):
+        self.name = name
+        self.fields = []
+        self.nested_entities = []
+        self.id_source = None
+        self.is_referable = False
+
+    def get_full_source(self) -> str:
+        items = ['{!r}: {}'.format(name, source) for name, source in self.fields]
+        items += ['{!r}: {}'.format(entity.name, entity.get_full_source()) for entity in self.nested_entities]
+        return '{{{}}}'.format(', '.join(items))
+
+    def get_flat_source(self) -> str:
+        """
+        Source of dict what refers the nested entities by id (or embeds them when these have not id field)
+        """
+        items = ['{!r}: {}'.format(name, source) for name, source in self.fields]
+        items += ['{!r}: {}'.format(entity.name, entity.id_source if entity.is_referable else entity.get_full_source())
+                  for entity in self.nested_entities]
+        return '{{{}}}'.format(', '.join(items))
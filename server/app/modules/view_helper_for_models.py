@@ -1,9 +1,11 @@
 import re
 from flask import request
 from marshmallow import Schema
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.inspection import inspect
 
+from app.modules.common import normalize_text
 from app.server import db
 
 
@@ -17,6 +19,44 @@ def nested_fields(**names_classes):
     return class_wrapper
 
 
+def normalized_fields(**names_sources):
+    """
+    Model decorator for shadow columns of normalized (accent- and case-insensitive) values of columns
+
+    The shadow columns are updated on every change of their source columns.
+
+    Example:
+    >>> @normalized_fields(normalized_name='name')
+    ... class Foo(db.Model):
+    ...     name = db.Column(db.String(60))
+    ...     normalized_name = db.Column(db.String(60), index=True)
+    """
+    return derived_fields(normalize_text, **names_sources)
+
+
+def derived_fields(derive: callable, **names_sources):
+    """
+    Model decorator for shadow columns of values derived from columns by the given function
+
+    Example:
+    >>> @derived_fields(get_natural_sort_key, location_sort_key='location')
+    ... class Foo(db.Model):
+    ...     location = db.Column(db.String(15))
+    ...     location_sort_key = db.Column(db.String(30), index=True)
+    """
+    def class_wrapper(cls):
+        for name, source in names_sources.items():
+            event.listen(getattr(cls, source), 'set', _get_deriver(name, derive))
+        return cls
+    return class_wrapper
+
+
+def _get_deriver(name: str, derive: callable) -> callable:
+    def deriver(target, value, old_value, initiator):
+        setattr(target, name, derive(value))
+    return deriver
+
+
 class RequestProcessingError(Exception):
     def __init__(self, message: (str, dict)):
         self.message = message
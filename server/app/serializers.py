@@ -14,7 +14,7 @@ Deserializer (client => server)
  * use `fields.Nested(<deserializerClass>, only=['id'])` for nested fields
 """
 from marshmallow import Schema, fields, ValidationError
-from marshmallow.validate import Regexp
+from marshmallow.validate import Length, Regexp
 from app.modules.basic_serializer import BasicSerializer
 
 
@@ -186,6 +186,19 @@ class BarcodeSerializer(BasicSerializer):
     fields = ('id', 'barcode', 'quantity', 'main', 'master', 'item_id')
 
 
+class BarcodeGenerationDeserializer(Schema):
+    item_ids = fields.List(fields.Int(), required=True, validate=Length(min=1, max=500))
+    quantity = fields.Float(missing=1.0, validate=_greater_than_zero)
+    master = fields.Bool()
+
+
+class BarcodeWithItemSerializer(BasicSerializer):
+    fields = BarcodeSerializer.fields
+    nested_fields = {
+        'item': ItemSerializer(),
+    }
+
+
 class WorkSerializer(BasicSerializer):
     fields = ('id', 'comment')
     datetime_fields = ('outbound_close_timestamp', 'returned_close_timestamp')
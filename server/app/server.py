@@ -7,6 +7,7 @@ from sqlalchemy_continuum import make_versioned, plugins
 from app import test_mode, doc_mode, log, static
 from app.config import get_config, check_warnings_in_config
 from app.modules.email import Email
+from app.modules.response_compressor import ResponseCompressor
 from app.modules.restful_api import RestfulApiWithoutSimpleAuth
 from app.version import Version
 
@@ -54,6 +55,10 @@ views.initialize_endpoints(config, api)
 if config.App.SHARE_STATIC:
     static.make_static_routes(app, config)
 
+# response compression
+if config.App.COMPRESSION:
+    ResponseCompressor(app, level=config.App.COMPRESSION_LEVEL, min_size=config.App.COMPRESSION_MIN_SIZE)
+
 # flask-admin
 if config.App.ADMIN_PAGE and not (test_mode or doc_mode):
     from app import admin
@@ -13,6 +13,8 @@ def initialize_endpoints(app_config: ConfigObject, api: RestfulApiWithoutSimpleA
         'acquisition_item': (acquisition.AcquisitionItemView, '/acquisitions/<int:id>/items/<int:item_id>'),
 
         'barcode_list': (barcode.BarcodeListView, '/barcodes'),
+        'barcode_generation': (item.BarcodeGenerationView, '/barcodes/generate'),
+        'barcode': (barcode.BarcodeView, '/barcodes/<string:barcode>'),
 
         'config': (config.ConfigView, '/config'),
 
@@ -23,11 +25,14 @@ def initialize_endpoints(app_config: ConfigObject, api: RestfulApiWithoutSimpleA
 
         'item_list': (item.ItemListView, '/items'),
         'item_search': (item.ItemSearchListView, '/items/search'),
+        'item_search_cache': (item.ItemSearchCacheView, '/items/search/cache'),
         'item': (item.ItemView, '/items/<int:id>'),
         'item_barcode_list': (item.ItemBarcodeListView, '/items/<int:id>/barcodes'),
         'item_barcode': (item.ItemBarcodeView, '/items/<int:item_id>/barcodes/<int:id>'),
         'item_barcode_print': (item.ItemBarcodePrintView, '/items/<int:item_id>/barcodes/<int:id>/print'),
 
+        'print_job': (item.PrintJobView, '/print-jobs/<int:id>'),
+
         'session': (session.SessionView, '/session'),
 
         'stocktaking_list': (stocktaking.StocktakingListView, '/stocktakings'),
@@ -1,6 +1,7 @@
 from app.models import Acquisition, AcquisitionItem
 from app.views.base_view import BaseView
 from app.modules.example_data import ExampleAcquisitions, ExampleAcquisitionItems
+from app.modules.row_serializer import RowSerializer
 from app.serializers import AcquisitionSerializer, AcquisitionDeserializer, AcquisitionItemSerializer, \
     AcquisitionItemDeserializer
 from app.views.common import api_func
@@ -50,6 +51,7 @@ class AcquisitionItemListView(BaseView):
     _parent_model = Acquisition
     _serializer = AcquisitionItemSerializer()
     _deserializer = AcquisitionItemDeserializer()
+    _row_serializer = RowSerializer(_model, _serializer)
 
     @api_func('List acquisition items', url_tail='/acquisitions/1/items',
               response=[ExampleAcquisitionItems.ITEM1.get(), ExampleAcquisitionItems.ITEM2.get()],
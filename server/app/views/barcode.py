@@ -1,15 +1,31 @@
 from app.models import Barcode
 from app.views.base_view import BaseView
 from app.modules.example_data import ExampleBarcodes
-from app.serializers import BarcodeSerializer
+from app.modules.row_serializer import RowSerializer
+from app.serializers import BarcodeSerializer, BarcodeWithItemSerializer
 from app.views.common import api_func
 
 
 class BarcodeListView(BaseView):
     _model = Barcode
     _serializer = BarcodeSerializer()
+    _row_serializer = RowSerializer(_model, _serializer)
 
     @api_func('List barcodes items', url_tail='/barcodes',
               response=[ExampleBarcodes.BARCODE1.get(), ExampleBarcodes.BARCODE2.get()])
     def get(self):
         return self._get_list()
+
+
+class BarcodeView(BaseView):
+    _model = Barcode
+    _serializer = BarcodeWithItemSerializer()
+    _row_serializer = RowSerializer(_model, _serializer)
+    _etag = False
+
+    @api_func('Get barcode with its item (for barcode scanners)', item_name='barcode',
+              url_tail='/barcodes/{}'.format(ExampleBarcodes.BARCODE1['barcode']),
+              params={'barcode': 'The looked up barcode'},
+              response=ExampleBarcodes.BARCODE1_WITH_ITEM.get())
+    def get(self, barcode: str):
+        return self._get(barcode=barcode)
@@ -1,11 +1,18 @@
-from flask import g
+from itertools import chain
+from flask import g, request, Response, stream_with_context
 from flask.ext.restful import abort, Resource
+from sqlalchemy import and_, false, func, or_, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import load_only, lazyload
+from sqlalchemy_continuum import version_class, versioning_manager
+from werkzeug.http import quote_etag, unquote_etag
 
+from app.modules.restful_api import dumps_json
 from app.modules.view_helper_for_models import PopulateModelOnSubmit, ModelDataDiffer, SqlErrorParser
-from app.server import db
+from app.server import db, version_info
 from app.models import User
-from app.views.common import commit_with_error_handling, commit_and_rollback_on_error
+from app.views.common import commit_with_error_handling, get_query_argument
 
 
 class BaseView(Resource):
@@ -41,13 +48,53 @@ class BaseView(Resource):
     >>>
     >>>     def delete(self, id: int):
     >>>         return self._delete(id=id)
+
+    The list getter supports keyset pagination by ``limit`` and ``after_id`` query arguments, e.g.
+    ``/foos?limit=100&after_id=200``. When the page is full, the id of its last object is sent back in the
+    ``X-Next-After-Id`` response header; this is the ``after_id`` of the next page. Sorted lists are paginated by the
+    sort keys and the id of the ``after_id`` object, so that object must not be deleted meanwhile.
+
+    Non-paginated lists can be streamed by the ``stream=1`` query argument; then the objects are fetched and
+    serialized in batches, and the JSON array is sent as a chunked response. It can not be used with ``included=1``.
+
+    The getters can serialize a subset of fields by the ``fields`` query argument, e.g. ``/foos?fields=id,name``;
+    then the not needed columns and joined relationships are not loaded from the database.
+
+    The nested objects of lists can be de-duplicated by the ``included=1`` query argument; then the response is
+    ``{"items": [...], "included": {...}}``, where the nested objects are sent once in the ``included`` side table (by
+    field name and id), and the items refer them by id.
+
+    Lists can be filtered and sorted by whitelisted query arguments, e.g. ``/foos?vendor_id=3&sort=-quantity,name``;
+    these are compiled into the WHERE and ORDER BY clauses of the query:
+    >>> class FooListView(BaseView):
+    >>>     _filters = {'vendor_id': ListFilter(int, lambda value: Foo.vendor_id == value)}
+    >>>     _sorts = {'name': Foo.name, 'quantity': Foo.quantity}
+
+    The getters send an ETag made from the latest transaction ids of the versioned tables of the model and its nested
+    models, and they respond with 304 (before querying and serializing the objects) when the ``If-None-Match`` request
+    header contains that. Views of hot paths can spare that query by ``_etag = False``.
+
+    Read-only views can skip the ORM object hydration by a row serializer:
+    >>> class FooListView(BaseView):
+    >>>     _model = Foo
+    >>>     _serializer = FooSerializer()
+    >>>     _row_serializer = RowSerializer(_model, _serializer)
     """
+    NEXT_CURSOR_HEADER = 'X-Next-After-Id'
 
     _model = None
     _parent_model = None
     _serializer = None
     _deserializer = None
+    _row_serializer = None
+    _filters = {}
+    _sorts = {}
+    _stream_batch_size = 500
+    _etag = True
     __differ = ModelDataDiffer()
+    __NULLS_ARE_LARGEST_DIALECTS = {'postgresql', 'oracle'}
+    __transaction_id_queries = {}
+    __TRANSACTION_ID_WINDOW = 100
 
     @property
     def _current_user(self) -> User:
@@ -57,15 +104,50 @@ class BaseView(Resource):
         """
         List model objects
         """
-        model_objects = self._model.query.filter_by(**filter)
-        return self.__serialize_many(model_objects)
+        headers = self.__get_etag_headers()
+        if self.__is_not_modified(headers):
+            return Response(status=304, headers=headers)
+
+        serializer, model_objects = self.__get_list_query(**filter)
+        model_objects = model_objects.filter(*self.__get_filter_criteria())
+        sorts = self.__get_sorts()
+
+        stream = get_query_argument('stream', int, default=0) == 1
+        dump_many = serializer.dump_many
+        if get_query_argument('included', int, default=0) == 1:
+            if stream:
+                abort(422, message={'stream': ['Can not be used with included.']})
+            dump_many = serializer.dump_many_included
+
+        limit = get_query_argument('limit', int)
+        if limit is None:
+            if sorts:
+                model_objects = model_objects.order_by(*self.__get_sort_orders(sorts))
+            if stream:
+                return self.__stream_many(serializer, model_objects, headers)
+            return dump_many(model_objects), 200, headers
+
+        page, page_headers = self.__get_page(model_objects, limit, after_id=get_query_argument('after_id', int),
+                                             sorts=sorts)
+        headers.update(page_headers)
+        return dump_many(page), 200, headers
 
     def _get(self, **filter) -> 'RPC response':
         """
         Single model object getter
         """
-        model_object = self._get_model_object(**filter)
-        return self.__serialize(model_object)
+        headers = self.__get_etag_headers()
+        if self.__is_not_modified(headers):
+            return Response(status=304, headers=headers)
+
+        if self._row_serializer is None:
+            serializer, model_objects = self.__select_fields(self._model.query.filter_by(**filter))
+            model_object = model_objects.scalar()
+        else:
+            serializer, rows = self.__get_list_query(**filter)
+            model_object = rows.first()
+        self.__check_is_missing(model_object)
+        return serializer.dump(model_object), 200, headers
 
     def _post(self, **filter) -> 'RPC response':
         """
@@ -81,20 +163,48 @@ class BaseView(Resource):
     def _post_retryable_commit(self, model_object_generator: callable, retry_count: int=10) -> 'RPC response':
         """
         Generate a new model object and try to save (trying, because want to skip collision)
+
+        The tries are flushed in savepoints, so a collision undoes the insert of the new object only, and the objects
+        what were loaded before are kept in the session. On SQLite a collision rolls back the whole session, because
+        pysqlite begins its transactions lazily, so a savepoint would be the transaction itself (and its release would
+        commit).
         """
         last_exception = None
         for retried_count in range(retry_count):
             model_object = model_object_generator()
-            db.session.add(model_object)
             try:
-                commit_and_rollback_on_error(db)
-                return self.__serialize(model_object)
+                self.__flush_try(model_object)
             except IntegrityError as e:
                 last_exception = e
+                continue
+            commit_with_error_handling(db)
+            return self.__serialize(model_object)
+
+        db.session.rollback()
         return abort(422, message='Can not generate unique model object; {}'.format(
             SqlErrorParser.parse(last_exception)
         ))
 
+    def __flush_try(self, model_object):
+        if db.session.get_bind().dialect.name != 'sqlite':
+            # the version transaction of Continuum is written before the savepoint, so a collision can not undo it
+            unit_of_work = versioning_manager.unit_of_work(db.session)
+            if unit_of_work.current_transaction is None:
+                unit_of_work.create_transaction(db.session)
+            db.session.flush()
+            with db.session.begin_nested():
+                db.session.add(model_object)
+            return
+
+        db.session.add(model_object)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            # the rolled back version transaction of Continuum stays in the session, while SQLite reuses its id
+            db.session.expunge_all()
+            raise
+
     def _put(self, **filter) -> 'RPC response':
         """
         Change single model object in one command
@@ -217,11 +327,205 @@ class BaseView(Resource):
         if not p.populate():
             abort(422, message=p.errors)
 
+    def __get_list_query(self, **filter) -> tuple:
+        """
+        Get serializer and query of model objects (or rows by the row serializer)
+        """
+        if self._row_serializer is None:
+            return self.__select_fields(self._model.query.filter_by(**filter))
+
+        row_serializer = self._row_serializer
+        field_names = self.__get_selected_field_names()
+        if field_names is not None:
+            row_serializer = row_serializer.only(field_names)
+
+        rows = row_serializer.get_query(db.session).filter(
+            *[getattr(self._model, name) == value for name, value in filter.items()])
+        return row_serializer, rows
+
+    def __select_fields(self, model_objects) -> tuple:
+        """
+        Get serializer and query for the fields what were selected by the ``fields`` query argument
+        """
+        field_names = self.__get_selected_field_names()
+        if field_names is None:
+            return self._serializer, model_objects
+
+        serializer = self._serializer.only(field_names)
+        return serializer, model_objects.options(*self.__get_load_options(serializer))
+
+    def __get_selected_field_names(self) -> (set, None):
+        field_names = get_query_argument('fields')
+        if field_names is None:
+            return None
+
+        field_names = set(name for name in field_names.split(',') if name)
+        unknown_field_names = field_names - self._serializer.field_names
+        if unknown_field_names:
+            abort(422, message={'fields': ['Unknown field(s): {}.'.format(', '.join(sorted(unknown_field_names)))]})
+        return field_names
+
+    def __get_load_options(self, serializer) -> list:
+        mapper = inspect(self._model)
+        column_names = set(name for name in list(serializer.fields) + list(serializer.datetime_fields) + ['id']
+                           if name in mapper.column_attrs.keys())
+
+        load_options = [load_only(*column_names)]
+        for relationship in mapper.relationships:
+            if relationship.lazy == 'joined' and relationship.key not in serializer.nested_fields.keys():
+                load_options.append(lazyload(relationship.key))
+        return load_options
+
+    def __get_etag_headers(self) -> dict:
+        """
+        Get ETag header by the latest transaction ids of the serialized tables
+
+        A transaction id is taken at the first flush, so a transaction can commit after a later one without changing
+        the latest id; therefore the count of versions in a window of recent transaction ids is in the ETag too.
+        """
+        if not self._etag:
+            return {}
+
+        transaction_id_query = self.__get_transaction_id_query()
+        if transaction_id_query is None:
+            return {}
+
+        values = db.session.execute(transaction_id_query).first()
+        return {'ETag': quote_etag('{}-{}'.format(version_info.release, '-'.join(str(value or 0) for value in values)))}
+
+    def __is_not_modified(self, headers: dict) -> bool:
+        return 'ETag' in headers.keys() and request.if_none_match.contains_weak(unquote_etag(headers['ETag'])[0])
+
+    def __get_transaction_id_query(self) -> ('SQL expression', None):
+        """
+        Get (cached) query of the latest transaction ids and the counts of recent versions of the version tables of
+        the model and its nested models
+
+        It is None when some of these models are not versioned.
+        """
+        view_class = type(self)
+        if view_class not in self.__transaction_id_queries.keys():
+            models = self.__get_serialized_models(self._model, self._serializer)
+            if not all(hasattr(model, '__versioned__') for model in models):
+                self.__transaction_id_queries[view_class] = None
+            else:
+                self.__transaction_id_queries[view_class] = select(list(chain.from_iterable(
+                    self.__get_transaction_id_columns(version_class(model).__table__)
+                    for model in sorted(models, key=lambda model: model.__name__)
+                )))
+        return self.__transaction_id_queries[view_class]
+
+    def __get_transaction_id_columns(self, version_table) -> tuple:
+        transaction_id = select([func.max(version_table.c.transaction_id)]).as_scalar()
+        version_count = select([func.count()]).where(
+            version_table.c.transaction_id > transaction_id - self.__TRANSACTION_ID_WINDOW
+        ).as_scalar()
+        return transaction_id, version_count
+
+    def __get_serialized_models(self, model, serializer) -> set:
+        models = {model}
+        relationships = inspect(model).mapper.relationships
+        for name, nested_serializer in serializer.nested_fields.items():
+            models |= self.__get_serialized_models(relationships[name].mapper.class_, nested_serializer)
+        return models
+
+    def __get_filter_criteria(self) -> list:
+        criteria = []
+        for name, list_filter in sorted(self._filters.items()):
+            value = get_query_argument(name, list_filter.argument_type)
+            if value is not None:
+                criteria.append(list_filter.get_criterion(name, value))
+        return criteria
+
+    def __get_sorts(self) -> list:
+        """
+        Get (expression, descending) pairs by the ``sort`` query argument; e.g. ``sort=-quantity,name``
+        """
+        sort_names = get_query_argument('sort')
+        if sort_names is None:
+            return []
+
+        sorts = [(name[1:], True) if name.startswith('-') else (name, False)
+                 for name in sort_names.split(',') if name]
+        unknown_sort_names = set(name for name, _ in sorts) - set(self._sorts.keys())
+        if unknown_sort_names:
+            abort(422, message={'sort': ['Unknown sort field(s): {}.'.format(', '.join(sorted(unknown_sort_names)))]})
+
+        return [(self._sorts[name], descending) for name, descending in sorts]
+
+    def __get_sort_orders(self, sorts: list) -> list:
+        """
+        Get ORDER BY expressions of the sorts, and the id as the last key (for stable order)
+        """
+        return [expression.desc() if descending else expression.asc() for expression, descending in sorts] + \
+            [self._model.id]
+
+    def __get_page(self, model_objects, limit: int, after_id: (int, None), sorts: list) -> tuple:
+        """
+        Get a page ordered by the sort keys and id
+        """
+        if limit < 1:
+            abort(422, message={'limit': ['Must be greater than 0.']})
+
+        if after_id is not None:
+            model_objects = model_objects.filter(self.__get_after_criterion(after_id, sorts))
+        page = model_objects.order_by(*self.__get_sort_orders(sorts)).limit(limit).all()
+
+        headers = {}
+        if len(page) == limit:
+            headers[self.NEXT_CURSOR_HEADER] = str(page[-1].id)
+
+        return page, headers
+
+    def __get_after_criterion(self, after_id: int, sorts: list) -> 'SQL expression':
+        """
+        Get criterion of the objects after an object in the order of the sort keys and id (keyset pagination)
+
+        The sort keys of the object are looked up, and the NULL keys are placed like the database orders them.
+        """
+        if not sorts:
+            return self._model.id > after_id
+
+        after_values = db.session.query(*[expression for expression, _ in sorts]).select_from(self._model).filter(
+            self._model.id == after_id).first()
+        if after_values is None:
+            abort(422, message={'after_id': ['Unknown id of sorted list.']})
+
+        nulls_are_largest = db.session.get_bind().dialect.name in self.__NULLS_ARE_LARGEST_DIALECTS
+        criteria = []
+        equal_criteria = []
+        for (expression, descending), value in zip(sorts, after_values):
+            nulls_are_after = nulls_are_largest != descending
+            if value is None:
+                later_criterion = false() if nulls_are_after else expression.isnot(None)
+            else:
+                later_criterion = expression < value if descending else expression > value
+                if nulls_are_after:
+                    later_criterion = or_(later_criterion, expression.is_(None))
+            criteria.append(and_(*equal_criteria + [later_criterion]))
+            equal_criteria.append(expression.is_(None) if value is None else expression == value)
+        criteria.append(and_(*equal_criteria + [self._model.id > after_id]))
+        return or_(*criteria)
+
     def __serialize(self, model_object) -> dict:
         return self._serializer.dump(model_object)
 
-    def __serialize_many(self, model_objects) -> list:
-        return self._serializer.dump_many(model_objects)
+    def __stream_many(self, serializer, model_objects, headers: dict) -> Response:
+        def generate():
+            yield '['
+            separator = ''
+            batch = []
+            for model_object in model_objects.yield_per(self._stream_batch_size):
+                batch.append(dumps_json(serializer.dump(model_object)))
+                if len(batch) == self._stream_batch_size:
+                    yield separator + ','.join(batch)
+                    separator = ','
+                    batch = []
+            if batch:
+                yield separator + ','.join(batch)
+            yield ']'
+
+        return Response(stream_with_context(generate()), mimetype='application/json', headers=headers)
 
     def __check_is_missing(self, model_object):
         if not model_object:
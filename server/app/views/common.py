@@ -1,6 +1,6 @@
 import flask
 import inspect
-from flask import g
+from flask import g, request
 from flask.ext.restful import abort
 from flask.ext.login import current_user, login_required as login_required_decorator, logout_user
 from flask.ext.sqlalchemy import SQLAlchemy
@@ -172,3 +172,29 @@ def commit_with_error_handling(db: SQLAlchemy):
         commit_and_rollback_on_error(db)
     except IntegrityError as e:
         abort(422, message=SqlErrorParser.parse(e))
+
+
+def flush_with_error_handling(db: SQLAlchemy):
+    """
+    Flush the changes (e.g. to get the generated ids before commit), and roll back with 422 on integrity error
+    """
+    try:
+        db.session.flush()
+    except IntegrityError as e:
+        db.session.rollback()
+        abort(422, message=SqlErrorParser.parse(e))
+
+
+def get_query_argument(name: str, argument_type: type=str, default=None):
+    """
+    Get a query argument of the current request converted to the given type
+
+    Abort with 422 when the argument can not be converted.
+    """
+    if name not in request.args.keys():
+        return default
+
+    try:
+        return argument_type(request.args[name])
+    except ValueError:
+        abort(422, message={name: ['Not a valid {}.'.format(argument_type.__name__)]})
@@ -1,5 +1,7 @@
 from app.models import Customer
 from app.views.base_view import BaseView
+from app.modules.common import normalize_text
+from app.modules.list_filter import PrefixFilter
 from app.modules.example_data import ExampleCustomers
 from app.serializers import CustomerSerializer, CustomerDeserializer
 from app.views.common import api_func
@@ -9,9 +11,18 @@ class CustomerListView(BaseView):
     _model = Customer
     _serializer = CustomerSerializer()
     _deserializer = CustomerDeserializer()
+    _filters = {
+        'q': PrefixFilter(Customer.normalized_name, normalize_text),
+    }
+    _sorts = {
+        'name': Customer.name,
+    }
 
     @api_func('List customers', url_tail='/customers',
-              response=[ExampleCustomers.CUSTOMER1.get(), ExampleCustomers.CUSTOMER2.get()])
+              response=[ExampleCustomers.CUSTOMER1.get(), ExampleCustomers.CUSTOMER2.get()],
+              params={'q': 'Filter for names starting with this (case and accent insensitive) (optional)',
+                      'sort': 'Comma separated sort fields; descending with \'-\' prefix [name] (optional)',
+                      })
     def get(self):
         return self._get_list()
 
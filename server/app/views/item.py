@@ -1,33 +1,63 @@
 import re
 from flask import send_file, request
 from flask.ext.restful import abort
-from sqlalchemy import or_, and_
 
 from app.server import config, db
 from app.models import Item, Barcode
 from app.views.base_view import BaseView
-from app.views.common import api_func
+from app.views.common import api_func, commit_with_error_handling, flush_with_error_handling
 from app.modules.example_data import ExampleItems, ExampleItemBarcodes, ExampleItemBarcodePrints, \
-    ExampleItemSearchResults
+    ExampleItemSearchResults, ExampleItemSearchCaches, ExampleBarcodeGenerations, ExamplePrintJobs
 from app.modules.common import CreateObject
+from app.modules.hi_lo_allocator import HiLoAllocator
+from app.modules.item_search import ItemSearch
 from app.modules.label_printer import LabelPrinter
+from app.modules.list_filter import ListFilter, FlagFilter, PrefixFilter
 from app.modules.view_helper_for_models import get_validated_request, RequestProcessingError
-from app.modules.printer import MissingCups
+from app.modules.print_queue import PrintQueue
+from app.modules.printer import MissingCups, Printer
 from app.modules.persistent_storage import PersistentStorage
+from app.modules.row_serializer import RowSerializer
 from app.serializers import ItemSerializer, ItemDeserializer, ItemBarcodeDeserializer, ItemBarcodeSerializer, \
-    ItemBarcodePrintDeserializer, ItemSearchSerializer
+    ItemBarcodePrintDeserializer, ItemSearchSerializer, BarcodeSerializer, BarcodeGenerationDeserializer
 
 __MAIN_BARCODE_FORMAT = re.compile(r'^' + re.escape(config.App.BARCODE_PREFIX) +
                                    '[0-9]{%d}' % config.App.BARCODE_NUMBERS + '$')
+__MAIN_BARCODE_PREFIX_FORMAT = re.compile(r'^' + re.escape(config.App.BARCODE_PREFIX) +
+                                          '[0-9]{1,%d}' % config.App.BARCODE_NUMBERS + '$')
+__SCANNED_BARCODE_FORMATS = [__MAIN_BARCODE_FORMAT] + [re.compile(r'^(?:' + pattern + ')$')
+                                                       for pattern in config.App.SCANNER_BARCODE_PATTERNS]
 
 
 class ItemListView(BaseView):
     _model = Item
     _serializer = ItemSerializer()
     _deserializer = ItemDeserializer()
+    _row_serializer = RowSerializer(_model, _serializer)
+    _filters = {
+        'vendor_id': ListFilter(int, lambda value: Item.vendor_id == value),
+        'unit_id': ListFilter(int, lambda value: Item.unit_id == value),
+        'location': ListFilter(str, lambda value: Item.location == value),
+        'location_prefix': PrefixFilter(Item.location),
+        'below_warning': FlagFilter(Item.quantity < Item.warning_quantity),
+    }
+    _sorts = {
+        'name': Item.name,
+        'article_number': Item.article_number,
+        'quantity': Item.quantity,
+        'location': Item.location_sort_key,
+    }
 
     @api_func('List items', url_tail='/items',
-              response=[ExampleItems.ITEM1.get(), ExampleItems.ITEM2.get()])
+              response=[ExampleItems.ITEM1.get(), ExampleItems.ITEM2.get()],
+              params={'vendor_id': 'Filter for vendor (optional)',
+                      'unit_id': 'Filter for unit (optional)',
+                      'location': 'Filter for location (optional)',
+                      'location_prefix': 'Filter for locations starting with this (optional)',
+                      'below_warning': 'Filter for quantity below warning quantity [0=False, 1=True] (optional)',
+                      'sort': 'Comma separated sort fields; descending with \'-\' prefix '
+                              '[name, article_number, quantity, location] (optional)',
+                      })
     def get(self):
         return self._get_list()
 
@@ -43,7 +73,8 @@ class ItemSearchListView(BaseView):
 
     @api_func('Search in items and barcodes', url_tail='/items/search?expression=sk&limit=6&barcodes=1&items=1',
               response=[ExampleItemSearchResults.RESULT1.get(), ExampleItemSearchResults.RESULT2.get()],
-              params={'expression': 'Query string (search in barcode, item name, article number)',
+              params={'expression': 'Query string (search for prefixes of words in barcode, item name, article '
+                                    'number; complete barcodes are matched exactly)',
                       'limit': 'Limit of result set [default: 6]',
                       'barcodes': 'Filter for master barcodes [0=False (default), 1=True]',
                       'items': 'Filter for items [0=False (default), 1=True]',
@@ -58,37 +89,39 @@ class ItemSearchListView(BaseView):
             'items': int(_get_query_value(request, 'items', default='0')) == 1,
         }
 
-        print(data)
+        if not ItemSearch.cache.max_size:
+            return self.__get_results(data)
+
+        key = (ItemSearch.get_cache_version(db.session.connection()), data['expression'], data['limit'],
+               data['barcodes'], data['items'])
+        results = ItemSearch.cache.get(key)
+        if results is None:
+            results = self.__get_results(data)
+            ItemSearch.cache.set(key, results)
+        return results
 
+    def __get_results(self, data: dict) -> list:
         results = []
-        expression = '%{}%'.format(data['expression'])
-
-        if data['barcodes']:
-            barcodes = Barcode.query.filter(
-                Barcode.barcode.ilike(expression)
-            ).limit(data['limit']).all()
-            results.extend([CreateObject(type='barcode', item_id=row.item_id, barcode=row.barcode,
-                                         quantity=row.quantity, name=row.item.name, unit=row.item.unit.unit)
-                            for row in barcodes])
-
-        if data['items'] and len(results) < data['limit']:
-            items = db.session.query(Item, Barcode).join(Barcode).filter(
-                and_(
-                    or_(
-                        Item.name.ilike(expression),
-                        Item.article_number.ilike(expression)
-                    ),
-                    Barcode.master
-                )
-            ).limit(data['limit'] - len(results)).all()
-            results.extend([CreateObject(type='item', item_id=row.Item.id, name=row.Item.name,
-                                         article_number=row.Item.article_number, vendor=row.Item.vendor.name,
-                                         unit=row.Item.unit.unit,
-                                         master_barcode=row.Barcode.barcode) for row in items])
+        for row in _search(ItemSearch(db.session), **data):
+            if row.type == ItemSearch.BARCODE:
+                results.append(CreateObject(type=row.type, item_id=row.item_id, barcode=row.barcode,
+                                            quantity=row.quantity, name=row.name, unit=row.unit))
+            else:
+                results.append(CreateObject(type=row.type, item_id=row.item_id, name=row.name,
+                                            article_number=row.article_number, vendor=row.vendor, unit=row.unit,
+                                            master_barcode=row.barcode))
 
         return self._serializer.dump(results, many=True).data
 
 
+class ItemSearchCacheView(BaseView):
+    @api_func('Get statistics of item search cache (of the serving process)', url_tail='/items/search/cache',
+              admin_required=True,
+              response=ExampleItemSearchCaches.CACHE1.get())
+    def get(self):
+        return ItemSearch.cache.get_statistics()
+
+
 class ItemView(BaseView):
     _model = Item
     _serializer = ItemSerializer()
@@ -116,6 +149,7 @@ class ItemBarcodeListView(BaseView):
     _parent_model = Item
     _serializer = ItemBarcodeSerializer()
     _deserializer = ItemBarcodeDeserializer()
+    _row_serializer = RowSerializer(_model, _serializer)
 
     @api_func('List barcodes.', url_tail='/items/1/barcodes',
               response=[ExampleItemBarcodes.BARCODE1.get(), ExampleItemBarcodes.BARCODE2.get()],
@@ -144,9 +178,7 @@ class ItemBarcodeListView(BaseView):
         _can_be_master_barcode(barcode)
 
         if barcode.barcode is None:
-            return self._post_retryable_commit(_get_barcode_generator(barcode_prefix=config.App.BARCODE_PREFIX,
-                                                                      count_of_numbers=int(config.App.BARCODE_NUMBERS),
-                                                                      base_barcode=barcode))
+            return self._post_retryable_commit(_get_barcode_generator(base_barcode=barcode))
         return self._post_commit(barcode)
 
 
@@ -187,6 +219,40 @@ class ItemBarcodeView(BaseView):
         return self._delete(item_id=item_id, id=id)
 
 
+class BarcodeGenerationView(BaseView):
+    _model = Barcode
+    _serializer = BarcodeSerializer()
+    _deserializer = BarcodeGenerationDeserializer()
+
+    @api_func('Generate main barcodes for many items at once (e.g. after an acquisition)',
+              url_tail='/barcodes/generate',
+              request=ExampleBarcodeGenerations.GENERATION1.set(),
+              response=[ExampleBarcodeGenerations.BARCODE1.get(), ExampleBarcodeGenerations.BARCODE2.get()],
+              status_codes={422: '{{ original }} / unknown items / '
+                                 'can not set more than one master barcode to an item'})
+    def post(self):
+        try:
+            data = get_validated_request(self._deserializer)
+        except RequestProcessingError as e:
+            abort(422, message=e.message)
+
+        item_ids = data['item_ids']
+        known_item_ids = set(item_id for item_id, in db.session.query(Item.id).filter(Item.id.in_(item_ids)))
+        unknown_item_ids = set(item_ids) - known_item_ids
+        if unknown_item_ids:
+            abort(422, message={'item_ids': ['Unknown item(s): {}.'.format(
+                ', '.join(str(item_id) for item_id in sorted(unknown_item_ids)))]})
+
+        barcodes = [Barcode(barcode=barcode, quantity=data['quantity'], item_id=item_id, master=master, main=True)
+                    for barcode, item_id, master in zip(_generate_barcodes(len(item_ids)), item_ids,
+                                                        _get_master_flags(item_ids, data.get('master')))]
+        db.session.add_all(barcodes)
+        flush_with_error_handling(db)
+        result = self._serializer.dump_many(barcodes)
+        commit_with_error_handling(db)
+        return result
+
+
 class ItemBarcodePrintView(BaseView):
     _model = Barcode
     _parent_model = Item
@@ -207,9 +273,11 @@ class ItemBarcodePrintView(BaseView):
         file_path = label_printer.print_to_pdf()
         return send_file(file_path, as_attachment=True)
 
-    @api_func('Print barcode label with some details', item_name='barcode', url_tail='/items/1/barcodes/1/print',
+    @api_func('Print barcode label with some details in background', item_name='barcode',
+              url_tail='/items/1/barcodes/1/print',
               request=ExampleItemBarcodePrints.PRINT1.set(),
-              response=None,
+              response=ExamplePrintJobs.JOB1.get(),
+              response_status=202,
               status_codes={400: 'missing pycups python3 module'},
               params={'item_id': 'ID of item',
                       'id': 'ID of selected barcode for get'})
@@ -227,41 +295,138 @@ class ItemBarcodePrintView(BaseView):
             copies = data['copies']
 
         try:
-            label_printer = _get_label_printer(barcode)
+            Printer.check_cups()
         except MissingCups as e:
             return abort(400, message=str(e))
 
-        if config.App.PRINT_ONE_LABEL_PER_JOB:
-            for i in range(copies):
-                label_printer.print()
-            return
+        return _print_queue.submit(_get_label_printer(barcode), copies=copies), 202
+
 
-        label_printer.print(copies=copies)
+class PrintJobView(BaseView):
+    @api_func('Get status of label printing', item_name='print job', url_tail='/print-jobs/1',
+              response=ExamplePrintJobs.JOB1_DONE.get())
+    def get(self, id: int):
+        job = _print_queue.get_job(id)
+        if job is None:
+            abort(404)
+        return job
 
 
-_persistent_storage = PersistentStorage('item')
+def _get_first_barcode_number() -> int:
+    """
+    Continue the numbers of the former file based counter (it was kept in JSON file whatever the storage backend is)
+    """
+    with PersistentStorage('item', read_only=True, backend='json') as storage:
+        return storage.get('last_barcode_number', default=0) + 1
 
 
-def _get_barcode_generator(barcode_prefix: str, count_of_numbers: int, base_barcode: Barcode) -> callable:
-    def generator():
-        with _persistent_storage as storage:
-            barcode_number = storage.get('last_barcode_number', default=0) + 1
-            barcode = '{prefix}{numbers}'.format(
-                prefix=barcode_prefix,
-                numbers=str(barcode_number).zfill(count_of_numbers)
-            )
-            storage.set('last_barcode_number', barcode_number)
+_TAKEN_BARCODE_CHECK_WINDOW = 100
+
+_print_queue = PrintQueue(worker_count=config.App.PRINT_QUEUE_WORKERS,
+                          retry_count=config.App.PRINT_QUEUE_RETRY_COUNT,
+                          retry_delay=config.App.PRINT_QUEUE_RETRY_DELAY,
+                          kept_job_count=config.App.PRINT_QUEUE_KEPT_JOBS,
+                          one_label_per_job=config.App.PRINT_ONE_LABEL_PER_JOB)
+
+_barcode_number_allocator = HiLoAllocator('barcode', block_size=config.App.BARCODE_NUMBER_BLOCK_SIZE,
+                                          get_first_number=lambda connection: _get_first_barcode_number())
+
 
+def _get_barcode_generator(base_barcode: Barcode) -> callable:
+    """
+    Get generator of new main barcodes what skips the taken ones (e.g. added by hand)
+
+    The taken barcodes are looked up by one query for a window of the next numbers, so a run of taken numbers (e.g.
+    after a reset of the counter) does not cost a query or a failed insert per number.
+    """
+    taken_barcodes = set()
+    checked_numbers = range(0)
+
+    def generator():
+        nonlocal checked_numbers
+        while True:
+            number = _barcode_number_allocator.allocate(db.engine)
+            if number not in checked_numbers:
+                checked_numbers = range(number, number + _TAKEN_BARCODE_CHECK_WINDOW)
+                taken_barcodes.update(_get_taken_barcodes([_format_main_barcode(number) for number in checked_numbers]))
+            barcode = _format_main_barcode(number)
+            if barcode not in taken_barcodes:
+                break
         return Barcode(barcode=barcode, quantity=base_barcode.quantity, item_id=base_barcode.item_id,
                        master=base_barcode.master, main=True)
 
     return generator
 
 
+def _generate_barcodes(count: int) -> list:
+    """
+    Generate main barcodes by a contiguous block of numbers; the already taken ones (e.g. by hand) are skipped
+    """
+    barcodes = []
+    while len(barcodes) < count:
+        new_barcodes = [_format_main_barcode(number)
+                        for number in _barcode_number_allocator.allocate_block(db.engine, count - len(barcodes))]
+        taken_barcodes = _get_taken_barcodes(new_barcodes)
+        barcodes += [barcode for barcode in new_barcodes if barcode not in taken_barcodes]
+    return barcodes
+
+
+def _get_taken_barcodes(barcodes: list) -> set:
+    return set(barcode for barcode, in db.session.query(Barcode.barcode).filter(Barcode.barcode.in_(barcodes)))
+
+
+def _get_master_flags(item_ids: list, master: (bool, None)) -> list:
+    """
+    Get master flags of new barcodes of items; by default the first new barcode of an item without barcodes is master
+    """
+    if master is False:
+        return [False] * len(item_ids)
+
+    criteria = [Barcode.master] if master else []
+    item_ids_with_barcodes = set(item_id for item_id, in db.session.query(Barcode.item_id).filter(
+        Barcode.item_id.in_(item_ids), *criteria).distinct())
+    if master and (item_ids_with_barcodes or len(set(item_ids)) < len(item_ids)):
+        abort(422, message={'master': ['Can not set more than one master barcode to an item.']})
+
+    flags = []
+    for item_id in item_ids:
+        flags.append(item_id not in item_ids_with_barcodes)
+        item_ids_with_barcodes.add(item_id)
+    return flags
+
+
+def _format_main_barcode(number: int) -> str:
+    return '{prefix}{numbers}'.format(prefix=config.App.BARCODE_PREFIX,
+                                      numbers=str(number).zfill(int(config.App.BARCODE_NUMBERS)))
+
+
 def _is_main_barcode(barcode: str) -> bool:
     return __MAIN_BARCODE_FORMAT.match(barcode)
 
 
+def _search(item_search: ItemSearch, expression: str, limit: int, barcodes: bool, items: bool) -> list:
+    """
+    Search barcodes and items by one query
+
+    Complete (scanned) barcodes are looked up by exact match and beginnings of main barcodes by prefix; when these do
+    not match (or find nothing) barcodes are searched for by the expression like items.
+    """
+    items_queries = [item_search.get_items_query(expression)] if items else []
+    if not barcodes:
+        return item_search.find(items_queries, limit)
+
+    if any(barcode_format.match(expression) for barcode_format in __SCANNED_BARCODE_FORMATS):
+        results = item_search.find([item_search.get_barcode_query(expression)] + items_queries, limit)
+    elif __MAIN_BARCODE_PREFIX_FORMAT.match(expression):
+        results = item_search.find([item_search.get_barcodes_by_prefix_query(expression)] + items_queries, limit)
+    else:
+        results = []
+
+    if not any(row.type == ItemSearch.BARCODE for row in results):
+        results = item_search.find([item_search.get_barcodes_query(expression)] + items_queries, limit)
+    return results
+
+
 def _can_be_master_barcode(barcode: Barcode):
     if not barcode.master:
         return
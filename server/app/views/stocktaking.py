@@ -1,8 +1,10 @@
 from flask.ext.restful import abort
 
-from app.models import Stocktaking, StocktakingItem
+from app.models import Item, Stocktaking, StocktakingItem
 from app.views.base_view import BaseView
 from app.modules.example_data import ExampleStocktakings, ExampleStocktakingItems
+from app.modules.list_filter import PrefixFilter, get_related_value
+from app.modules.row_serializer import RowSerializer
 from app.serializers import StocktakingSerializer, StocktakingDeserializer, StocktakingItemSerializer, \
     StocktakingItemDeserializer
 from app.views.common import api_func
@@ -52,10 +54,20 @@ class StocktakingItemListView(BaseView):
     _parent_model = Stocktaking
     _serializer = StocktakingItemSerializer()
     _deserializer = StocktakingItemDeserializer()
+    _row_serializer = RowSerializer(_model, _serializer)
+    _filters = {
+        'location_prefix': PrefixFilter(Item.location, foreign_key=StocktakingItem.item_id),
+    }
+    _sorts = {
+        'location': get_related_value(Item.location_sort_key, StocktakingItem.item_id),
+    }
 
     @api_func('List stocktaking items.', url_tail='/stocktakings/1/items',
               response=[ExampleStocktakingItems.ITEM1.get(), ExampleStocktakingItems.ITEM2.get()],
-              params={'id': 'ID of stocktaking'})
+              params={'id': 'ID of stocktaking',
+                      'location_prefix': 'Filter for locations of items starting with this (optional)',
+                      'sort': 'Comma separated sort fields; descending with \'-\' prefix [location] (optional)',
+                      })
     def get(self, id: int):
         self._initialize_parent_model_object(id)
         return self._get_list(stocktaking_id=id)
@@ -1,5 +1,7 @@
 from app.models import Unit
 from app.views.base_view import BaseView
+from app.modules.common import normalize_text
+from app.modules.list_filter import PrefixFilter
 from app.modules.example_data import ExampleUnits
 from app.serializers import UnitSerializer, UnitDeserializer
 from app.views.common import api_func
@@ -9,9 +11,18 @@ class UnitListView(BaseView):
     _model = Unit
     _serializer = UnitSerializer()
     _deserializer = UnitDeserializer()
+    _filters = {
+        'q': PrefixFilter(Unit.normalized_unit, normalize_text),
+    }
+    _sorts = {
+        'unit': Unit.unit,
+    }
 
     @api_func('List units', url_tail='/units',
-              response=[ExampleUnits.UNIT1.get(), ExampleUnits.UNIT2.get()])
+              response=[ExampleUnits.UNIT1.get(), ExampleUnits.UNIT2.get()],
+              params={'q': 'Filter for units starting with this (optional)',
+                      'sort': 'Comma separated sort fields; descending with \'-\' prefix [unit] (optional)',
+                      })
     def get(self):
         return self._get_list()
 
@@ -1,5 +1,7 @@
 from app.models import Vendor
 from app.views.base_view import BaseView
+from app.modules.common import normalize_text
+from app.modules.list_filter import PrefixFilter
 from app.modules.example_data import ExampleVendors
 from app.serializers import VendorSerializer, VendorDeserializer
 from app.views.common import api_func
@@ -9,9 +11,18 @@ class VendorListView(BaseView):
     _model = Vendor
     _serializer = VendorSerializer()
     _deserializer = VendorDeserializer()
+    _filters = {
+        'q': PrefixFilter(Vendor.normalized_name, normalize_text),
+    }
+    _sorts = {
+        'name': Vendor.name,
+    }
 
     @api_func('List vendors', url_tail='/vendors',
-              response=[ExampleVendors.VENDOR1.get(), ExampleVendors.VENDOR2.get()])
+              response=[ExampleVendors.VENDOR1.get(), ExampleVendors.VENDOR2.get()],
+              params={'q': 'Filter for names starting with this (case and accent insensitive) (optional)',
+                      'sort': 'Comma separated sort fields; descending with \'-\' prefix [name] (optional)',
+                      })
     def get(self):
         return self._get_list()
 
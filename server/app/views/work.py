@@ -1,9 +1,11 @@
 from flask.ext.restful import abort
 
-from app.models import Work, WorkItem
+from app.models import Item, Work, WorkItem
 from app.views.base_view import BaseView
 from app.modules.common import any_in
 from app.modules.example_data import ExampleWorks, ExampleWorkItems
+from app.modules.list_filter import ListFilter, FlagFilter, PrefixFilter, get_related_value
+from app.modules.row_serializer import RowSerializer
 from app.serializers import WorkSerializer, WorkDeserializer, WorkItemSerializer, WorkItemDeserializer
 from app.views.common import api_func
 
@@ -12,9 +14,22 @@ class WorkListView(BaseView):
     _model = Work
     _serializer = WorkSerializer()
     _deserializer = WorkDeserializer()
+    _filters = {
+        'customer_id': ListFilter(int, lambda value: Work.customer_id == value),
+        'open': FlagFilter(Work.returned_close_user_id.is_(None)),
+    }
+    _sorts = {
+        'outbound_close_timestamp': Work.outbound_close_timestamp,
+        'returned_close_timestamp': Work.returned_close_timestamp,
+    }
 
     @api_func('List works', url_tail='/works',
-              response=[ExampleWorks.WORK1.get(), ExampleWorks.WORK2.get()])
+              response=[ExampleWorks.WORK1.get(), ExampleWorks.WORK2.get()],
+              params={'customer_id': 'Filter for customer (optional)',
+                      'open': 'Filter for works with not closed returned items [0=False, 1=True] (optional)',
+                      'sort': 'Comma separated sort fields; descending with \'-\' prefix '
+                              '[outbound_close_timestamp, returned_close_timestamp] (optional)',
+                      })
     def get(self):
         return self._get_list()
 
@@ -52,10 +67,20 @@ class WorkItemListView(BaseView):
     _parent_model = Work
     _serializer = WorkItemSerializer()
     _deserializer = WorkItemDeserializer()
+    _row_serializer = RowSerializer(_model, _serializer)
+    _filters = {
+        'location_prefix': PrefixFilter(Item.location, foreign_key=WorkItem.item_id),
+    }
+    _sorts = {
+        'location': get_related_value(Item.location_sort_key, WorkItem.item_id),
+    }
 
     @api_func('List work items', url_tail='/works/1/items',
               response=[ExampleWorkItems.ITEM1.get(), ExampleWorkItems.ITEM2.get()],
-              params={'id': 'ID of work'})
+              params={'id': 'ID of work',
+                      'location_prefix': 'Filter for locations of items starting with this (optional)',
+                      'sort': 'Comma separated sort fields; descending with \'-\' prefix [location] (optional)',
+                      })
     def get(self, id: int):
         self._initialize_parent_model_object(id)
         return self._get_list(work_id=id)
@@ -71,6 +71,10 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # the full-text index tables are maintained by app.modules.item_search.FullTextIndex
+    def include_object(object, name, type_, reflected, compare_to):
+        return not (type_ == 'table' and '_fts' in name)
+
     engine = engine_from_config(config.get_section(config.config_ini_section),
                                 prefix='sqlalchemy.',
                                 poolclass=pool.NullPool)
@@ -82,6 +86,7 @@ def run_migrations_online():
                       compare_server_default=True,
                       render_as_batch=True,
                       process_revision_directives=process_revision_directives,
+                      include_object=include_object,
                       template_args=template_args,
                       **current_app.extensions['migrate'].configure_args)
 
@@ -0,0 +1,134 @@
+"""StoreKeeper v0.6.0
+
+Revision ID: b6b003567b06
+Revises: 5bab6d876c88
+Create Date: 2026-10-18 10:12:31.418275
+
+"""
+
+revision = 'b6b003567b06'
+down_revision = '5bab6d876c88'
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.modules.common import get_natural_sort_key, normalize_text
+from app.modules.item_search import FullTextIndex
+
+DERIVED_COLUMNS = {
+    'customer': {'normalized_name': ('name', normalize_text)},
+    'item': {'normalized_name': ('name', normalize_text),
+             'normalized_article_number': ('article_number', normalize_text),
+             'location_sort_key': ('location', get_natural_sort_key)},
+    'unit': {'normalized_unit': ('unit', normalize_text)},
+    'vendor': {'normalized_name': ('name', normalize_text)},
+}
+
+
+def upgrade():
+    op.create_table('counter',
+    sa.Column('name', sa.String(length=30), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('normalized_name', sa.String(length=60), nullable=True))
+        batch_op.create_index(batch_op.f('ix_customer_normalized_name'), ['normalized_name'], unique=False)
+
+    with op.batch_alter_table('item', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('location_sort_key', sa.String(length=45), nullable=True))
+        batch_op.add_column(sa.Column('normalized_article_number', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('normalized_name', sa.String(length=60), nullable=True))
+        batch_op.create_index(batch_op.f('ix_item_article_number'), ['article_number'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_location'), ['location'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_location_sort_key'), ['location_sort_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_normalized_article_number'), ['normalized_article_number'],
+                              unique=False)
+        batch_op.create_index(batch_op.f('ix_item_normalized_name'), ['normalized_name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_quantity'), ['quantity'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_unit_id'), ['unit_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_vendor_id'), ['vendor_id'], unique=False)
+
+    with op.batch_alter_table('item_version', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_item_version_article_number'), ['article_number'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_version_quantity'), ['quantity'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_version_unit_id'), ['unit_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_item_version_vendor_id'), ['vendor_id'], unique=False)
+
+    with op.batch_alter_table('unit', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('normalized_unit', sa.String(length=20), nullable=True))
+        batch_op.create_index(batch_op.f('ix_unit_normalized_unit'), ['normalized_unit'], unique=False)
+
+    with op.batch_alter_table('vendor', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('normalized_name', sa.String(length=60), nullable=True))
+        batch_op.create_index(batch_op.f('ix_vendor_normalized_name'), ['normalized_name'], unique=False)
+
+    with op.batch_alter_table('work', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_work_customer_id'), ['customer_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_work_returned_close_user_id'), ['returned_close_user_id'], unique=False)
+
+    with op.batch_alter_table('work_version', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_work_version_customer_id'), ['customer_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_work_version_returned_close_user_id'), ['returned_close_user_id'], unique=False)
+
+    _fill_up_derived_columns()
+
+    for table_name in sorted(FullTextIndex.TABLES.keys()):
+        FullTextIndex.create(op.get_bind(), table_name)
+
+
+def downgrade():
+    for table_name in sorted(FullTextIndex.TABLES.keys()):
+        FullTextIndex.drop(op.get_bind(), table_name)
+
+    with op.batch_alter_table('work_version', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_work_version_returned_close_user_id'))
+        batch_op.drop_index(batch_op.f('ix_work_version_customer_id'))
+
+    with op.batch_alter_table('work', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_work_returned_close_user_id'))
+        batch_op.drop_index(batch_op.f('ix_work_customer_id'))
+
+    with op.batch_alter_table('vendor', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_vendor_normalized_name'))
+        batch_op.drop_column('normalized_name')
+
+    with op.batch_alter_table('unit', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_unit_normalized_unit'))
+        batch_op.drop_column('normalized_unit')
+
+    with op.batch_alter_table('item_version', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_item_version_vendor_id'))
+        batch_op.drop_index(batch_op.f('ix_item_version_unit_id'))
+        batch_op.drop_index(batch_op.f('ix_item_version_quantity'))
+        batch_op.drop_index(batch_op.f('ix_item_version_article_number'))
+
+    with op.batch_alter_table('item', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_item_vendor_id'))
+        batch_op.drop_index(batch_op.f('ix_item_unit_id'))
+        batch_op.drop_index(batch_op.f('ix_item_quantity'))
+        batch_op.drop_index(batch_op.f('ix_item_normalized_name'))
+        batch_op.drop_index(batch_op.f('ix_item_normalized_article_number'))
+        batch_op.drop_index(batch_op.f('ix_item_location_sort_key'))
+        batch_op.drop_index(batch_op.f('ix_item_location'))
+        batch_op.drop_index(batch_op.f('ix_item_article_number'))
+        batch_op.drop_column('normalized_name')
+        batch_op.drop_column('normalized_article_number')
+        batch_op.drop_column('location_sort_key')
+
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_customer_normalized_name'))
+        batch_op.drop_column('normalized_name')
+
+    op.drop_table('counter')
+
+
+def _fill_up_derived_columns():
+    connection = op.get_bind()
+    for table_name, names_sources in sorted(DERIVED_COLUMNS.items()):
+        sources = set(source for source, _ in names_sources.values())
+        table = sa.table(table_name, *[sa.column(name) for name in {'id'} | set(names_sources.keys()) | sources])
+        for row in connection.execute(sa.select([table.c.id] + [table.c[source] for source in sorted(sources)])):
+            values = dict((name, derive(row[source])) for name, (source, derive) in names_sources.items())
+            connection.execute(table.update().where(table.c.id == row['id']).values(**values))
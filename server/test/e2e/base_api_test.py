@@ -46,13 +46,15 @@ class LowLevelCommonApiTest(CommonTestWithDatabaseSupport):
         self.client = app.test_client()
 
     def assertApiRequest(self, command: str, url: str, data: (dict, None)=None,
-                         expected_data: (str, list, dict, None)=None, expected_status_codes: (int, list)=200):
+                         expected_data: (str, list, dict, None)=None,
+                         expected_status_codes: (int, list)=200, headers: (dict, None)=None) -> Response:
         __tracebackhide__ = True
-        request = {'command': command, 'url': url, 'data': json.dumps(data)}
+        request = {'command': command, 'url': url, 'data': json.dumps(data), 'headers': headers}
         response = self.__call_api(**request)
         if expected_data is not None:
             self.__assert_response_data(expected_data, response, request=request)
         self.__assert_status_code(expected_status_codes, response, request=request)
+        return response
 
     def __assert_response_data(self, expected_data: (str, list, dict, None), response: Response, request: dict):
         """
@@ -83,9 +85,9 @@ class LowLevelCommonApiTest(CommonTestWithDatabaseSupport):
         assert response.status_code in expected_status_codes, \
             'Not expected status code\n\nrequest={!r}\nresponse={!r}'.format(request, response.data.decode('utf-8'))
 
-    def __call_api(self, command: str, data: str, url: str):
+    def __call_api(self, command: str, data: str, url: str, headers: (dict, None)):
         return getattr(self.client, command)('/{!s}/api{!s}'.format(config.App.NAME, url),
-                                             content_type='application/json', data=data)
+                                             content_type='application/json', data=data, headers=headers)
 
     def __make_testable_data(self, data: (str, list, dict)) -> (str, list, dict):
         __tracebackhide__ = True
@@ -143,12 +145,13 @@ class CommonApiTest(LowLevelCommonApiTest):
 
     def assertApiGet(self, id: (int, str, None)=None, data: (dict, FilterableDict, None)=None,
                      endpoint: (str, None)=None, url_suffix: str='',
-                     expected_data: (list, dict, None)=None, expected_status_codes: (int, list)=200):
+                     expected_data: (list, dict, None)=None, expected_status_codes: (int, list)=200,
+                     headers: (dict, None)=None) -> Response:
         __tracebackhide__ = True
-        self.assertApiRequest('get', self.__get_url(endpoint, id, url_suffix),
-                              data=self.__extract_data(data, 'set'),
-                              expected_data=self.__extract_data(expected_data, 'get'),
-                              expected_status_codes=expected_status_codes)
+        return self.assertApiRequest('get', self.__get_url(endpoint, id, url_suffix),
+                                     data=self.__extract_data(data, 'set'),
+                                     expected_data=self.__extract_data(expected_data, 'get'),
+                                     expected_status_codes=expected_status_codes, headers=headers)
 
     def assertApiPost(self, data: (dict, FilterableDict), endpoint: (str, None)=None, url_suffix: str='',
                       expected_data: (str, list, dict, None)=None, expected_status_codes: (int, list)=200):
@@ -1,8 +1,27 @@
 import unittest
+from contextlib import contextmanager
+from sqlalchemy import event
 
 from app.server import app, config, db
 
 
+@contextmanager
+def record_queries() -> list:
+    """
+    Record the SQL statements executed in the block
+    """
+    statements = []
+
+    def record(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
 class CommonTestWithDatabaseSupport(unittest.TestCase):
     """
     Super class of database based tests
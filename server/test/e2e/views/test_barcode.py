@@ -1,6 +1,14 @@
+import json
+import tempfile
+from unittest import mock
+
+from app.server import config
+from app.modules import persistent_storage
 from app.modules.example_data import ExampleItemBarcodes as ItemBarcodes, ExampleBarcodes as Barcodes, \
-    ExampleItems as Items, ExampleVendors as Vendors, ExampleUnits as Units
+    ExampleItems as Items, ExampleVendors as Vendors, ExampleUnits as Units, \
+    ExampleBarcodeGenerations as BarcodeGenerations
 from test.e2e.base_api_test import CommonApiTest
+from test.e2e.base_database_test import record_queries
 
 
 class TestBarcodeWithPreFilledDb(CommonApiTest):
@@ -17,3 +25,117 @@ class TestBarcodeWithPreFilledDb(CommonApiTest):
         self.assertApiGet(expected_data=[Barcodes.BARCODE1,
                                          Barcodes.BARCODE3,
                                          Barcodes.BARCODE2])
+
+    def test_list_barcodes_by_pages(self):
+        response = self.assertApiGet(url_suffix='?limit=2',
+                                     expected_data=[Barcodes.BARCODE1,
+                                                    Barcodes.BARCODE2])
+        assert response.headers['X-Next-After-Id'] == '2'
+
+        response = self.assertApiGet(url_suffix='?limit=2&after_id=2',
+                                     expected_data=[Barcodes.BARCODE3])
+        assert 'X-Next-After-Id' not in response.headers
+
+    def test_get_barcode_with_its_item(self):
+        self.assertApiGet(ItemBarcodes.BARCODE1['barcode'],
+                          expected_data=Barcodes.BARCODE1.get_changed(getters={'item': Items.ITEM1.get()}))
+        self.assertApiGet(ItemBarcodes.BARCODE2['barcode'],
+                          expected_data=Barcodes.BARCODE2.get_changed(getters={'item': Items.ITEM1.get()}))
+
+    def test_get_barcode_by_one_query(self):
+        with record_queries() as statements:
+            response = self.assertApiGet(ItemBarcodes.BARCODE2['barcode'])
+        assert len(statements) == 1
+        assert 'ETag' not in response.headers
+
+    def test_can_not_get_missing_barcode(self):
+        self.assertApiGet('SKT99999', expected_status_codes=404)
+
+    def test_can_not_list_barcodes_with_bad_page_arguments(self):
+        self.assertApiGet(url_suffix='?limit=0',
+                          expected_data={'message': {'limit': ['Must be greater than 0.']}},
+                          expected_status_codes=422)
+        self.assertApiGet(url_suffix='?limit=2&after_id=foo',
+                          expected_data={'message': {'after_id': ['Not a valid int.']}},
+                          expected_status_codes=422)
+
+
+class TestBarcodeGenerationWithPreFilledDb(CommonApiTest):
+    ENDPOINT = '/barcodes/generate'
+    INIT_PUSH = [
+        ('/vendors', [Vendors.VENDOR1, Vendors.VENDOR2]),
+        ('/units', [Units.UNIT1, Units.UNIT2]),
+        ('/items', [Items.ITEM1, Items.ITEM2, Items.ITEM3]),
+        ('/items/1/barcodes', [ItemBarcodes.BARCODE1, ItemBarcodes.BARCODE2]),
+    ]
+
+    def test_generate_barcodes(self):
+        self.assertApiPost(data=BarcodeGenerations.GENERATION1,
+                           expected_data=[BarcodeGenerations.BARCODE1, BarcodeGenerations.BARCODE2])
+        self.assertApiGet(endpoint='/items/1/barcodes', url_suffix='?fields=id,main,master',
+                          expected_data=[{'id': 1, 'main': True, 'master': True},
+                                         {'id': 2, 'main': False, 'master': False},
+                                         {'id': 3, 'main': True, 'master': False}])
+
+        first_number, second_number = [int(barcode[len(config.App.BARCODE_PREFIX):])
+                                       for barcode in self.__get_barcodes()[-2:]]
+        assert second_number == first_number + 1
+
+    def test_generate_barcodes_for_one_item(self):
+        self.assertApiPost(data={'item_ids': [3, 3]},
+                           expected_data=[{'id': 3, 'barcode': '<BC>', 'quantity': 1.0, 'item_id': 3,
+                                           'master': True, 'main': True},
+                                          {'id': 4, 'barcode': '<BC>', 'quantity': 1.0, 'item_id': 3,
+                                           'master': False, 'main': True}])
+
+    def test_numbers_of_former_file_based_counter_are_continued(self):
+        # the former counter was kept in JSON file, whatever the backend of persistent storage is configured
+        with tempfile.TemporaryDirectory() as storage_dir, \
+                mock.patch.object(persistent_storage, 'persistent_storage_dir', storage_dir), \
+                mock.patch.dict(config['App'], {'PERSISTENT_STORAGE_BACKEND': 'sqlite'}):
+            with persistent_storage.PersistentStorage('item', backend='json') as storage:
+                storage.set('last_barcode_number', 41)
+            self.assertApiPost(data={'item_ids': [3]})
+
+        assert self.__get_barcodes()[-1] == '{}{}'.format(config.App.BARCODE_PREFIX,
+                                                          '42'.zfill(config.App.BARCODE_NUMBERS))
+
+    def test_taken_barcodes_are_skipped(self):
+        self.assertApiPost(data={'item_ids': [3]})
+        last_number = int(self.__get_barcodes()[-1][len(config.App.BARCODE_PREFIX):])
+        taken_barcode = '{}{}'.format(config.App.BARCODE_PREFIX,
+                                      str(last_number + 1).zfill(config.App.BARCODE_NUMBERS))
+        self.assertApiPost(endpoint='/items/3/barcodes', data={'barcode': taken_barcode, 'master': False})
+
+        self.assertApiPost(data={'item_ids': [2, 3]})
+        barcodes = self.__get_barcodes()
+        assert len(set(barcodes)) == len(barcodes) == 6
+
+    def test_can_not_generate_barcodes_for_unknown_items(self):
+        self.assertApiPost(data={'item_ids': [1, 5, 4]},
+                           expected_data={'message': {'item_ids': ['Unknown item(s): 4, 5.']}},
+                           expected_status_codes=422)
+
+    def test_can_not_generate_barcodes_without_items(self):
+        self.assertApiPost(data={'item_ids': []}, expected_status_codes=422)
+        self.assertApiPost(data={'quantity': 2.0}, expected_status_codes=422)
+
+    def test_can_not_generate_more_master_barcodes_for_an_item(self):
+        message = {'message': {'master': ['Can not set more than one master barcode to an item.']}}
+        self.assertApiPost(data={'item_ids': [1, 2], 'master': True}, expected_data=message,
+                           expected_status_codes=422)
+        self.assertApiPost(data={'item_ids': [2, 2], 'master': True}, expected_data=message,
+                           expected_status_codes=422)
+        self.assertApiGet(endpoint='/barcodes', expected_data=[Barcodes.BARCODE1, Barcodes.BARCODE2])
+
+    def test_can_not_generate_barcode_taken_meanwhile(self):
+        # e.g. the barcode is added by hand by an other request between the check and the insert
+        with mock.patch('app.views.item._generate_barcodes', return_value=[ItemBarcodes.BARCODE1['barcode']]):
+            self.assertApiPost(data={'item_ids': [3]},
+                               expected_data={'message': {'barcode': ['Already exists.']}},
+                               expected_status_codes=422)
+        self.assertApiGet(endpoint='/barcodes', expected_data=[Barcodes.BARCODE1, Barcodes.BARCODE2])
+
+    def __get_barcodes(self) -> list:
+        response = self.assertApiGet(endpoint='/barcodes')
+        return [barcode['barcode'] for barcode in json.loads(response.data.decode('utf-8'))]
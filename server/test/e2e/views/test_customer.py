@@ -57,3 +57,9 @@ class TestUserWithPreFilledDb(CommonApiTest):
         request = Customers.CUSTOMER2.set(change={'name': Customers.CUSTOMER1['name']})
 
         self.assertApiPut(Customers.CUSTOMER2['id'], data=request, expected_status_codes=422)
+
+    def test_list_customers_by_name_prefix(self):
+        self.assertApiGet(url_suffix='?q=b', expected_data=[Customers.CUSTOMER1, Customers.CUSTOMER2])
+        self.assertApiGet(url_suffix='?q=BUY', expected_data=[Customers.CUSTOMER2])
+        self.assertApiGet(url_suffix='?q=b&sort=-name&limit=1', expected_data=[Customers.CUSTOMER2])
+        self.assertApiGet(url_suffix='?q=customer', expected_data=[])
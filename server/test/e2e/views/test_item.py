@@ -1,9 +1,26 @@
+import json
+from contextlib import contextmanager
+import shutil
+from flask.ext.restful import abort
+from sqlalchemy import select
+from sqlalchemy_continuum import version_class, versioning_manager
+import tempfile
+import time
+from unittest import mock
+
+from app.modules import persistent_storage
 from app.modules.example_data import ExampleItems as Items, ExampleVendors as Vendors, ExampleUnits as Units, \
-    ExampleItemBarcodes as ItemBarcodes
+    ExampleItemBarcodes as ItemBarcodes, ExampleItemBarcodePrints as ItemBarcodePrints, \
+    ExamplePrintJobs as PrintJobs
+from app.modules.item_search import FullTextIndex, ItemSearch, TrigramIndex
+from app.models import Barcode, Item, Vendor
+from app.modules.lru_cache import LruCache
+from app.server import config, db
 from test.e2e.base_api_test import CommonApiTest, append_mandatory_field_tests
+from test.e2e.base_database_test import record_queries
 
 
-# I do not want to check the output of printing, therefore this feature is tested only by rights
+# I do not want to check the output of printing, therefore the printer is mocked
 
 @append_mandatory_field_tests(item_name='item', base_item=Items.ITEM1,
                               mandatory_fields=['name', 'vendor', 'unit'])
@@ -45,10 +62,135 @@ class TestItemWithPreFilledDb(CommonApiTest):
         self.assertApiGet(expected_data=[Items.ITEM1,
                                          Items.ITEM2])
 
+    def test_list_items_as_stream(self):
+        self.assertApiGet(url_suffix='?stream=1',
+                          expected_data=[Items.ITEM1,
+                                         Items.ITEM2])
+
+    def test_list_selected_fields_of_items(self):
+        self.assertApiGet(url_suffix='?fields=id,name,vendor',
+                          expected_data=[Items.ITEM1.get(['id', 'name', 'vendor']),
+                                         Items.ITEM2.get(['id', 'name', 'vendor'])])
+
+    def test_list_items_with_included_objects(self):
+        self.assertApiGet(url_suffix='?included=1&fields=id,name,vendor,unit',
+                          expected_data={
+                              'items': [dict(Items.ITEM1.get(['id', 'name']), vendor=1, unit=2),
+                                        dict(Items.ITEM2.get(['id', 'name']), vendor=2, unit=1)],
+                              'included': {
+                                  'vendor': {'1': Vendors.VENDOR1.get(), '2': Vendors.VENDOR2.get()},
+                                  'unit': {'1': Units.UNIT1.get(), '2': Units.UNIT2.get()},
+                              },
+                          })
+
+    def test_can_not_list_items_as_stream_with_included_objects(self):
+        self.assertApiGet(url_suffix='?stream=1&included=1',
+                          expected_data={'message': {'stream': ['Can not be used with included.']}},
+                          expected_status_codes=422)
+
+    def test_list_filtered_items(self):
+        self.assertApiGet(url_suffix='?vendor_id=1', expected_data=[Items.ITEM1])
+        self.assertApiGet(url_suffix='?unit_id=1', expected_data=[Items.ITEM2])
+        self.assertApiGet(url_suffix='?location=B02%2F01', expected_data=[Items.ITEM2])
+        self.assertApiGet(url_suffix='?below_warning=1', expected_data=[Items.ITEM1])
+        self.assertApiGet(url_suffix='?below_warning=0&vendor_id=1', expected_data=[])
+
+    def test_list_items_by_location_prefix(self):
+        self.assertApiGet(url_suffix='?location_prefix=A12%2F', expected_data=[Items.ITEM1])
+        self.assertApiGet(url_suffix='?location_prefix=B', expected_data=[Items.ITEM2])
+        self.assertApiGet(url_suffix='?location_prefix=A2', expected_data=[])
+
+    def test_list_items_in_natural_order_of_locations(self):
+        item3 = Items.ITEM3.get(change={'location': 'A2/3'})
+        self.assertApiPost(data=Items.ITEM3.set(change={'location': 'A2/3'}), expected_data=item3)
+        self.assertApiGet(url_suffix='?sort=location', expected_data=[item3, Items.ITEM1, Items.ITEM2])
+        self.assertApiGet(url_suffix='?sort=-location&limit=1', expected_data=[Items.ITEM2])
+
+    def test_can_not_list_items_by_invalid_filter(self):
+        self.assertApiGet(url_suffix='?below_warning=2',
+                          expected_data={'message': {'below_warning': ['Must be 0 or 1.']}},
+                          expected_status_codes=422)
+
+    def test_list_sorted_items(self):
+        self.assertApiGet(url_suffix='?sort=name&limit=1', expected_data=[Items.ITEM2])
+        self.assertApiGet(url_suffix='?sort=-name&limit=1', expected_data=[Items.ITEM1])
+        self.assertApiGet(url_suffix='?sort=quantity,-location&limit=1', expected_data=[Items.ITEM2])
+
+    def test_can_not_list_items_by_unknown_sort(self):
+        self.assertApiGet(url_suffix='?sort=name,-foo',
+                          expected_data={'message': {'sort': ['Unknown sort field(s): foo.']}},
+                          expected_status_codes=422)
+
+    def test_list_sorted_items_by_pages(self):
+        self.assertApiPost(data=Items.ITEM3)
+        for sort in ['name', '-name', 'location', '-location', 'quantity,-location', '-quantity,name']:
+            items = json.loads(self.assertApiGet(url_suffix='?sort={}'.format(sort)).data.decode('utf-8'))
+            assert self.__get_pages(sort) == [[item] for item in items]
+
+    def test_can_not_list_sorted_items_after_unknown_id(self):
+        self.assertApiGet(url_suffix='?sort=name&limit=1&after_id=5',
+                          expected_data={'message': {'after_id': ['Unknown id of sorted list.']}},
+                          expected_status_codes=422)
+
+    def __get_pages(self, sort: str) -> list:
+        pages = []
+        response = self.assertApiGet(url_suffix='?sort={}&limit=1'.format(sort))
+        while 'X-Next-After-Id' in response.headers:
+            pages.append(json.loads(response.data.decode('utf-8')))
+            response = self.assertApiGet(url_suffix='?sort={}&limit=1&after_id={}'.format(
+                sort, response.headers['X-Next-After-Id']))
+        assert json.loads(response.data.decode('utf-8')) == []
+        return pages
+
+    def test_list_items_by_etag(self):
+        etag = self.assertApiGet().headers['ETag']
+        response = self.assertApiGet(headers={'If-None-Match': etag}, expected_status_codes=304)
+        assert response.data == b''
+
+        self.assertApiPut(2, endpoint='/vendors', data=Vendors.VENDOR2.set(change={'name': 'Another Vendor'}))
+        response = self.assertApiGet(headers={'If-None-Match': etag},
+                                     expected_data=[Items.ITEM1,
+                                                    Items.ITEM2.get(change={'vendor': {'id': 2,
+                                                                                       'name': 'Another Vendor'}})])
+        assert response.headers['ETag'] != etag
+
+    def test_etag_follows_changes_committed_after_later_transactions(self):
+        self.assertApiPut(2, endpoint='/vendors', data=Vendors.VENDOR2.set(change={'name': 'Another Vendor'}))
+        self.assertApiPut(1, data=Items.ITEM1.set(change={'name': 'Paint'}))
+        # the rename of the vendor is not committed yet, while the later transaction is
+        vendor_version = version_class(Vendor).__table__
+        late_version = db.session.execute(
+            vendor_version.select().where(vendor_version.c.name == 'Another Vendor')).first()
+        db.session.execute(vendor_version.delete().where(vendor_version.c.name == 'Another Vendor'))
+        db.session.commit()
+        etag = self.assertApiGet().headers['ETag']
+
+        db.session.execute(vendor_version.insert().values(**dict(late_version)))
+        db.session.commit()
+        response = self.assertApiGet(headers={'If-None-Match': etag})
+        assert response.headers['ETag'] != etag
+
+    def test_get_item_by_etag(self):
+        etag = self.assertApiGet(2).headers['ETag']
+        self.assertApiGet(2, headers={'If-None-Match': etag}, expected_status_codes=304)
+        self.assertApiGet(2, headers={'If-None-Match': '"foo", W/{}'.format(etag)}, expected_status_codes=304)
+
+        self.assertApiDelete(1)
+        self.assertApiGet(2, headers={'If-None-Match': etag}, expected_data=Items.ITEM2)
+
+    def test_can_not_list_unknown_fields_of_items(self):
+        self.assertApiGet(url_suffix='?fields=id,foo,bar',
+                          expected_data={'message': {'fields': ['Unknown field(s): bar, foo.']}},
+                          expected_status_codes=422)
+
     def test_get_item(self):
         self.assertApiGet(2, expected_data=Items.ITEM2)
         self.assertApiGet(1, expected_data=Items.ITEM1)
 
+    def test_get_selected_fields_of_item(self):
+        self.assertApiGet(2, url_suffix='?fields=unit,location',
+                          expected_data=Items.ITEM2.get(['unit', 'location']))
+
     def test_remove_item(self):
         self.assertApiDelete(1)
         self.assertApiGet(expected_data=[Items.ITEM2])
@@ -86,6 +228,254 @@ class TestItemWithPreFilledDb(CommonApiTest):
         self.assertApiPut(Items.ITEM2['id'], data=request, expected_status_codes=422)
 
 
+class TestItemSearchWithPreFilledDb(CommonApiTest):
+    ENDPOINT = '/items/search'
+    QUERY_COUNT = 1
+    INIT_PUSH = [
+        ('/vendors', [Vendors.VENDOR1, Vendors.VENDOR2]),
+        ('/units', [Units.UNIT1, Units.UNIT2]),
+        ('/items', [Items.ITEM1, Items.ITEM2, Items.ITEM3]),
+        ('/items/1/barcodes', [ItemBarcodes.BARCODE1, ItemBarcodes.BARCODE2]),
+        ('/items/2/barcodes', [ItemBarcodes.BARCODE3.set(change={'master': True})]),
+    ]
+    BARCODE_RESULT = {'type': 'barcode', 'item_id': 1, 'barcode': ItemBarcodes.BARCODE2['barcode'], 'quantity': 1,
+                      'name': Items.ITEM1['name'], 'unit': Units.UNIT2['unit']}
+    ITEM_RESULT = {'type': 'item', 'item_id': 2, 'name': Items.ITEM2['name'],
+                   'article_number': Items.ITEM2['article_number'], 'vendor': Vendors.VENDOR2['name'],
+                   'unit': Units.UNIT1['unit'], 'master_barcode': ItemBarcodes.BARCODE1['barcode'], 'quantity': None}
+
+    def test_search_by_prefixes_of_words(self):
+        self.assertApiGet(url_suffix='?expression=184&barcodes=1&items=1', expected_data=[self.BARCODE_RESULT])
+        self.assertApiGet(url_suffix='?expression=pipe%20fo&barcodes=1&items=1', expected_data=[self.ITEM_RESULT])
+        self.assertApiGet(url_suffix='?expression=ipe&items=1', expected_data=[])
+
+    def test_search_ignores_accents_and_case(self):
+        self.assertApiPut(2, endpoint='/items', data=Items.ITEM2.set(change={'name': 'Árvíztűrő Tükörfúrógép'}))
+
+        self.assertApiGet(url_suffix='?expression=TUKORF&items=1',
+                          expected_data=[dict(self.ITEM_RESULT, name='Árvíztűrő Tükörfúrógép')])
+        self.assertApiGet(url_suffix='?expression=tükörf&items=1',
+                          expected_data=[dict(self.ITEM_RESULT, name='Árvíztűrő Tükörfúrógép')])
+
+    def test_search_by_not_word_expression(self):
+        self.assertApiGet(url_suffix='?expression=-&barcodes=1', expected_data=[self.BARCODE_RESULT])
+
+    def test_search_follows_changes_of_items(self):
+        request = Items.ITEM2.set(change={'name': 'Hose'})
+        self.assertApiPut(2, endpoint='/items', data=request)
+
+        self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[])
+        self.assertApiGet(url_suffix='?expression=hose&items=1', expected_data=[dict(self.ITEM_RESULT, name='Hose')])
+
+        self.assertApiDelete(2, endpoint='/items/1/barcodes')
+        self.assertApiGet(url_suffix='?expression=184&barcodes=1', expected_data=[])
+
+    def test_search_by_complete_or_beginning_of_main_barcode(self):
+        barcode = ItemBarcodes.BARCODE1['barcode']
+        barcode_result = dict(self.BARCODE_RESULT, barcode=barcode, quantity=32)
+
+        with mock.patch.object(ItemSearch, 'get_barcodes_query') as get_barcodes_query:
+            self.assertApiGet(url_suffix='?expression={}&barcodes=1'.format(barcode), expected_data=[barcode_result])
+            self.assertApiGet(url_suffix='?expression={}&barcodes=1'.format(barcode[:-1]),
+                              expected_data=[barcode_result])
+        assert not get_barcodes_query.called
+
+    def test_search_by_scanned_barcode(self):
+        self.assertApiPost(endpoint='/items/3/barcodes', data={'barcode': '5901234123457', 'quantity': 1})
+        self.assertApiPost(endpoint='/items/3/barcodes', data={'barcode': '1234567890', 'quantity': 1})
+        barcode_result = {'type': 'barcode', 'item_id': 3, 'barcode': '5901234123457', 'quantity': 1,
+                          'name': Items.ITEM3['name'], 'unit': Units.UNIT2['unit']}
+
+        with mock.patch.object(ItemSearch, 'get_barcodes_query') as get_barcodes_query:
+            self.assertApiGet(url_suffix='?expression=5901234123457&barcodes=1', expected_data=[barcode_result])
+        assert not get_barcodes_query.called
+
+        self.assertApiGet(url_suffix='?expression=12345678&barcodes=1',
+                          expected_data=[dict(barcode_result, barcode='1234567890')])
+
+    def test_missing_full_text_index_is_checked_again_after_an_interval(self):
+        ItemSearch.reset()
+        with mock.patch.object(ItemSearch, 'cache', LruCache(max_size=0)):
+            with mock.patch.object(FullTextIndex, 'is_created', return_value=False):
+                self.assertApiGet(url_suffix='?expression=ipe&items=1', expected_data=[self.ITEM_RESULT])
+
+            # e.g. the index is created by an upgrade of the database
+            with mock.patch.object(FullTextIndex, 'is_created', return_value=True):
+                self.assertApiGet(url_suffix='?expression=ipe&items=1', expected_data=[self.ITEM_RESULT])
+                with mock.patch('app.modules.item_search.time.monotonic', return_value=time.monotonic() + 60):
+                    self.assertApiGet(url_suffix='?expression=ipe&items=1', expected_data=[])
+                    self.assertApiGet(url_suffix='?expression=ipe&items=1', expected_data=[])
+                assert FullTextIndex.is_created.call_count == 1
+
+    def test_search_by_one_query(self):
+        self.assertApiGet(url_suffix='?expression=sk&barcodes=1&items=1')
+
+        with mock.patch.object(ItemSearch, 'cache', LruCache(max_size=0)), record_queries() as statements:
+            response = self.assertApiGet(url_suffix='?expression=sk&barcodes=1&items=1')
+        assert len(statements) == self.QUERY_COUNT
+        assert [row['type'] for row in json.loads(response.data.decode('utf-8'))] == ['barcode', 'barcode', 'item']
+
+    def test_repeated_search_is_cached(self):
+        self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[self.ITEM_RESULT])
+        statistics = ItemSearch.cache.get_statistics()
+
+        with record_queries() as statements:
+            self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[self.ITEM_RESULT])
+        assert len(statements) == 0
+        self.assertApiGet(endpoint='/items/search/cache', expected_data=dict(statistics, hits=statistics['hits'] + 1))
+
+    def test_cached_search_follows_changes_committed_by_other_processes(self):
+        self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[self.ITEM_RESULT])
+
+        with self.__commit_by_other_process():
+            request = Items.ITEM2.set(change={'name': 'Hose'})
+            self.assertApiPut(2, endpoint='/items', data=request)
+
+            # the changes of other processes are checked once per interval only
+            self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[self.ITEM_RESULT])
+            with self.__after_check_interval():
+                self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[])
+
+    def test_cached_search_follows_changes_committed_after_later_transactions(self):
+        with self.__commit_by_other_process():
+            self.assertApiPut(Vendors.VENDOR2['id'], endpoint='/vendors', data={'name': 'Light Duty Ltd.'})
+            self.assertApiPut(Vendors.VENDOR1['id'], endpoint='/vendors', data={'name': 'Hardware Ltd.'})
+            # the rename of the vendor is not committed yet, while the later transaction is
+            vendor = Vendor.__table__
+            vendor_version = version_class(Vendor).__table__
+            late_version = db.session.execute(
+                vendor_version.select().where(vendor_version.c.name == 'Light Duty Ltd.')).first()
+            db.session.execute(vendor_version.delete().where(vendor_version.c.name == 'Light Duty Ltd.'))
+            db.session.execute(vendor.update().where(vendor.c.id == Vendors.VENDOR2['id']).values(
+                name=Vendors.VENDOR2['name']))
+            db.session.commit()
+            with self.__after_check_interval():
+                self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[self.ITEM_RESULT])
+
+            db.session.execute(vendor_version.insert().values(**dict(late_version)))
+            db.session.execute(vendor.update().where(vendor.c.id == Vendors.VENDOR2['id']).values(
+                name='Light Duty Ltd.'))
+            db.session.commit()
+            with self.__after_check_interval(2):
+                self.assertApiGet(url_suffix='?expression=pipe&items=1',
+                                  expected_data=[dict(self.ITEM_RESULT, vendor='Light Duty Ltd.')])
+
+    def test_cached_search_follows_renamed_vendors_and_units(self):
+        self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[self.ITEM_RESULT])
+
+        self.assertApiPut(Vendors.VENDOR2['id'], endpoint='/vendors', data={'name': 'Light Duty Ltd.'})
+        self.assertApiGet(url_suffix='?expression=pipe&items=1',
+                          expected_data=[dict(self.ITEM_RESULT, vendor='Light Duty Ltd.')])
+
+        with self.__commit_by_other_process(), self.__after_check_interval():
+            self.assertApiPut(Units.UNIT1['id'], endpoint='/units', data={'unit': 'pieces'})
+            self.assertApiGet(url_suffix='?expression=pipe&items=1',
+                              expected_data=[dict(self.ITEM_RESULT, vendor='Light Duty Ltd.', unit='pieces')])
+
+    @staticmethod
+    @contextmanager
+    def __commit_by_other_process():
+        with mock.patch.object(ItemSearch.cache, 'clear'), mock.patch.object(ItemSearch, 'increment_generation'):
+            yield
+
+    @staticmethod
+    def __after_check_interval(count: int=1):
+        return mock.patch('app.modules.item_search.time.monotonic',
+                          return_value=time.monotonic() + count * config.App.ITEM_SEARCH_CACHE_CHECK_INTERVAL)
+
+
+class TestItemSearchByTrigramIndexWithPreFilledDb(TestItemSearchWithPreFilledDb):
+    # Catching up the changes of the trigram index needs an extra query
+    QUERY_COUNT = 2
+
+    def setUp(self):
+        self.__full_text_index_patcher = mock.patch.object(FullTextIndex, 'is_created', return_value=False)
+        self.__full_text_index_patcher.start()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self.__full_text_index_patcher.stop()
+
+    def test_search_by_prefixes_of_words(self):
+        self.assertApiGet(url_suffix='?expression=184&barcodes=1&items=1', expected_data=[self.BARCODE_RESULT])
+        self.assertApiGet(url_suffix='?expression=ipe&items=1', expected_data=[self.ITEM_RESULT])
+
+    def test_search_by_short_expression(self):
+        self.assertApiGet(url_suffix='?expression=fo&items=1', expected_data=[self.ITEM_RESULT])
+
+    def test_search_follows_changes_committed_by_other_processes(self):
+        with mock.patch.object(TrigramIndex, 'apply'):
+            self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[self.ITEM_RESULT])
+
+            request = Items.ITEM2.set(change={'name': 'Hose'})
+            self.assertApiPut(2, endpoint='/items', data=request)
+
+            self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[])
+            self.assertApiGet(url_suffix='?expression=hose&items=1',
+                              expected_data=[dict(self.ITEM_RESULT, name='Hose')])
+
+    def test_next_chunks_are_not_queried_after_the_results_are_full(self):
+        db.session.add_all(Item(name='Disk {}'.format(number), vendor_id=1, unit_id=1) for number in range(3))
+        db.session.commit()
+        self.assertApiGet(url_suffix='?expression=sk&barcodes=1&items=1')
+
+        with mock.patch.object(ItemSearch, 'cache', LruCache(max_size=0)), \
+                mock.patch.object(ItemSearch, '_ItemSearch__ID_CHUNK_SIZE', 1), record_queries() as statements:
+            response = self.assertApiGet(url_suffix='?expression=sk&barcodes=1&items=1&limit=2')
+        assert [row['type'] for row in json.loads(response.data.decode('utf-8'))] == ['barcode', 'barcode']
+        # the items (after the barcodes) are queried in the first round only
+        assert len(statements) <= self.QUERY_COUNT + 1
+
+    def test_search_follows_changes_committed_after_later_transactions(self):
+        with mock.patch.object(TrigramIndex, 'apply'):
+            self.assertApiGet(url_suffix='?expression=pipe&items=1', expected_data=[self.ITEM_RESULT])
+
+            self.assertApiPut(2, endpoint='/items', data=Items.ITEM2.set(change={'name': 'Hose'}))
+            self.assertApiPut(3, endpoint='/items', data=Items.ITEM3.set(change={'name': 'Nail'}))
+            # the rename of the pipe is not committed yet, while the later transaction is
+            item_version = version_class(Item).__table__
+            late_version = db.session.execute(item_version.select().where(item_version.c.name == 'Hose')).first()
+            db.session.execute(item_version.delete().where(item_version.c.name == 'Hose'))
+            db.session.commit()
+            self.assertApiGet(url_suffix='?expression=nail&items=1')
+
+            db.session.execute(item_version.insert().values(**dict(late_version)))
+            db.session.commit()
+            self.assertApiPut(1, endpoint='/items', data=Items.ITEM1.set(change={'name': 'Paint'}))
+
+            self.assertApiGet(url_suffix='?expression=hose&items=1',
+                              expected_data=[dict(self.ITEM_RESULT, name='Hose')])
+
+    def test_search_looks_for_results_beyond_the_first_chunk_of_ids(self):
+        # the first 600 matching items have no master barcode, so these are dropped from the results
+        db.session.add_all(Item(name='Wrench {:03d}'.format(number), vendor_id=1, unit_id=1) for number in range(600))
+        item = Item(name='Wrench 600', vendor_id=1, unit_id=1)
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Barcode(barcode='SKT00600', item_id=item.id, master=True))
+        db.session.commit()
+
+        self.assertApiGet(url_suffix='?expression=wrench&items=1',
+                          expected_data=[{'type': 'item', 'item_id': item.id, 'name': 'Wrench 600',
+                                          'article_number': None, 'vendor': Vendors.VENDOR1['name'],
+                                          'unit': Units.UNIT1['unit'], 'master_barcode': 'SKT00600',
+                                          'quantity': None}])
+
+
+class TestItemSearchByScanWithPreFilledDb(TestItemSearchByTrigramIndexWithPreFilledDb):
+    QUERY_COUNT = 1
+
+    def setUp(self):
+        self.__trigram_index_patcher = mock.patch.dict(config['App'], {'ITEM_SEARCH_TRIGRAM_INDEX': False})
+        self.__trigram_index_patcher.start()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self.__trigram_index_patcher.stop()
+
+
 @append_mandatory_field_tests(item_name='barcode', base_item=ItemBarcodes.BARCODE1,
                               mandatory_fields=[])
 class TestItemBarcodeWithBrandNewDb(CommonApiTest):
@@ -137,6 +527,66 @@ class TestItemBarcodeWithBrandNewDb(CommonApiTest):
                                'Can not set more than one master barcode to an item.']}},
                            expected_status_codes=422)
 
+    def test_taken_barcodes_are_skipped_by_one_query(self):
+        self.assertApiPost(data=ItemBarcodes.BARCODE3)
+        number = int(self.__get_barcodes()[-1][len(config.App.BARCODE_PREFIX):])
+        for taken_number in range(number + 1, number + 4):
+            self.assertApiPost(data={'barcode': self.__format_barcode(taken_number), 'master': False})
+
+        with record_queries() as statements:
+            self.assertApiPost(data=ItemBarcodes.BARCODE3)
+        assert self.__get_barcodes()[-1] == self.__format_barcode(number + 4)
+        assert len([statement for statement in statements if statement.startswith('INSERT INTO barcode ')]) == 1
+
+    def test_collision_is_retried(self):
+        self.assertApiPost(data=ItemBarcodes.BARCODE3)
+        number = int(self.__get_barcodes()[-1][len(config.App.BARCODE_PREFIX):])
+        self.assertApiPost(data={'barcode': self.__format_barcode(number + 1), 'master': False})
+
+        # the barcode is taken meanwhile by an other request
+        with mock.patch('app.views.item._get_taken_barcodes', return_value=set()), record_queries() as statements:
+            self.assertApiPost(data=ItemBarcodes.BARCODE3)
+        assert self.__get_barcodes()[-1] == self.__format_barcode(number + 2)
+        assert len([statement for statement in statements if statement.startswith('INSERT INTO barcode ')]) == 2
+        # pysqlite can not nest savepoints into its lazily begun transactions
+        assert not [statement for statement in statements if 'SAVEPOINT' in statement]
+
+    def test_collision_is_retried_in_savepoint(self):
+        self.assertApiPost(data=ItemBarcodes.BARCODE3)
+        number = int(self.__get_barcodes()[-1][len(config.App.BARCODE_PREFIX):])
+        self.assertApiPost(data={'barcode': self.__format_barcode(number + 1), 'master': False})
+
+        # the savepoints are used on the other database backends
+        with mock.patch('app.views.item._get_taken_barcodes', return_value=set()), \
+                mock.patch.object(db.session, 'get_bind', return_value=mock.Mock(**{'dialect.name': 'postgresql'})), \
+                record_queries() as statements:
+            self.assertApiPost(data=ItemBarcodes.BARCODE3)
+        assert len([statement for statement in statements if statement.startswith('SAVEPOINT')]) == 2
+
+        barcode = self.__format_barcode(number + 2)
+        assert self.__get_barcodes()[-1] == barcode
+        barcode_version = version_class(Barcode).__table__
+        transaction = versioning_manager.transaction_cls.__table__
+        assert db.session.execute(
+            select([transaction.c.id]).select_from(barcode_version.join(
+                transaction, barcode_version.c.transaction_id == transaction.c.id
+            )).where(barcode_version.c.barcode == barcode)
+        ).fetchall() != []
+
+    def test_generated_barcode_is_saved_in_one_transaction(self):
+        with mock.patch('app.views.base_view.commit_with_error_handling',
+                        side_effect=lambda db: abort(422, message='Failed')):
+            self.assertApiPost(data=ItemBarcodes.BARCODE3, expected_status_codes=422)
+        self.assertApiGet(expected_data=[])
+
+    def __get_barcodes(self) -> list:
+        response = self.assertApiGet()
+        return [barcode['barcode'] for barcode in json.loads(response.data.decode('utf-8'))]
+
+    @staticmethod
+    def __format_barcode(number: int) -> str:
+        return '{}{}'.format(config.App.BARCODE_PREFIX, str(number).zfill(config.App.BARCODE_NUMBERS))
+
 
 class TestItemBarcodeWithPreFilledDb(CommonApiTest):
     ENDPOINT = '/items/1/barcodes'
@@ -194,3 +644,44 @@ class TestItemBarcodeWithPreFilledDb(CommonApiTest):
         self.assertApiPut(ItemBarcodes.BARCODE2['id'], data=ItemBarcodes.BARCODE2.set(change={'main': True}),
                           expected_data=ItemBarcodes.BARCODE2,
                           expected_status_codes=200)
+
+
+class TestItemBarcodePrintWithPreFilledDb(CommonApiTest):
+    ENDPOINT = '/items/1/barcodes'
+    INIT_PUSH = [
+        ('/vendors', [Vendors.VENDOR1]),
+        ('/units', [Units.UNIT1, Units.UNIT2]),
+        ('/items', [Items.ITEM1]),
+        ('/items/1/barcodes', [ItemBarcodes.BARCODE1]),
+    ]
+
+    def setUp(self):
+        self.__storage_dir = tempfile.mkdtemp()
+        self.__patchers = [mock.patch.object(persistent_storage, 'persistent_storage_dir', self.__storage_dir),
+                           mock.patch('app.views.item.Printer.check_cups'),
+                           mock.patch('app.views.item.LabelPrinter.print')]
+        for patcher in self.__patchers:
+            patcher.start()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        for patcher in reversed(self.__patchers):
+            patcher.stop()
+        shutil.rmtree(self.__storage_dir)
+
+    def test_label_is_printed_in_background(self):
+        self.assertApiPut(ItemBarcodes.BARCODE1['id'], url_suffix='/print', data=ItemBarcodePrints.PRINT1,
+                          expected_data=PrintJobs.JOB1, expected_status_codes=202)
+        self.__wait_for_print_job(PrintJobs.JOB1['id'])
+        self.assertApiGet(PrintJobs.JOB1['id'], endpoint='/print-jobs', expected_data=PrintJobs.JOB1_DONE)
+
+    def test_can_not_get_missing_print_job(self):
+        self.assertApiGet(PrintJobs.JOB1['id'], endpoint='/print-jobs', expected_status_codes=404)
+
+    def __wait_for_print_job(self, job_id: int):
+        for _ in range(500):
+            response = self.assertApiGet(job_id, endpoint='/print-jobs')
+            if json.loads(response.data.decode('utf-8'))['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.01)
@@ -1,10 +1,14 @@
+from unittest import mock
+
 from app.modules.example_data import (
     ExampleAcquisitions as Acquisitions,
     ExampleAcquisitionItems as AcquisitionItems,
     ExampleBarcodes as Barcodes,
+    ExampleBarcodeGenerations as BarcodeGenerations,
     ExampleCustomers as Customers,
     ExampleItems as Items,
     ExampleItemBarcodes as ItemBarcodes,
+    ExamplePrintJobs as PrintJobs,
     ExampleUnits as Units,
     ExampleStocktakings as Stocktakings,
     ExampleStocktakingItems as StocktakingItems,
@@ -81,6 +85,48 @@ class TestItemBarcodeRights(CommonRightsTest):
     }
 
 
+@use_as_rights_data_provider('/barcodes/{}'.format(ItemBarcodes.BARCODE2['barcode']))
+class TestBarcodeLookupRights(CommonRightsTest):
+    INIT_PUSH = [
+        ('/vendors', [Vendors.VENDOR1]),
+        ('/units', [Units.UNIT1, Units.UNIT2]),
+        ('/items', [Items.ITEM1]),
+        ('/items/1/barcodes', [ItemBarcodes.BARCODE2]),
+    ]
+    RIGHTS = {
+        'anonymous': {
+            'get': False,
+        },
+        'admin': {
+            'get': True,
+        },
+        'user1': {
+            'get': True,
+        },
+    }
+
+
+@use_as_rights_data_provider('/barcodes/generate')
+class TestBarcodeGenerationRights(CommonRightsTest):
+    INIT_PUSH = [
+        ('/vendors', [Vendors.VENDOR1, Vendors.VENDOR2]),
+        ('/units', [Units.UNIT1, Units.UNIT2]),
+        ('/items', [Items.ITEM1, Items.ITEM2]),
+    ]
+    DATA_MAP = {'generation1': BarcodeGenerations.GENERATION1}
+    RIGHTS = {
+        'anonymous': {
+            'post': [('generation1', False)],
+        },
+        'admin': {
+            'post': [('generation1', True)],
+        },
+        'user1': {
+            'post': [('generation1', True)],
+        },
+    }
+
+
 @use_as_rights_data_provider('/config')
 class TestConfigRights(CommonRightsTest):
     RIGHTS = {
@@ -114,6 +160,21 @@ class TestItemRights(CommonRightsTest):
     RIGHTS = _get_all_rights_for_logged_in_users('item1', 'item2')
 
 
+@use_as_rights_data_provider('/items/search/cache')
+class TestItemSearchCacheRights(CommonRightsTest):
+    RIGHTS = {
+        'anonymous': {
+            'get': False,
+        },
+        'admin': {
+            'get': True,
+        },
+        'user1': {
+            'get': False,
+        },
+    }
+
+
 @use_as_rights_data_provider('/items/1/barcodes')
 class TestBarcodeRights(CommonRightsTest):
     INIT_PUSH = [
@@ -147,6 +208,30 @@ class TestBarcodeLabelPrintingRights(CommonRightsTest):
     }
 
 
+@use_as_rights_data_provider('/print-jobs/{}'.format(PrintJobs.JOB1['id']))
+class TestPrintJobRights(CommonRightsTest):
+    RIGHTS = {
+        'anonymous': {
+            'get': False,
+        },
+        'admin': {
+            'get': True,
+        },
+        'user1': {
+            'get': True,
+        },
+    }
+
+    def setUp(self):
+        self.__patcher = mock.patch('app.views.item._print_queue.get_job', return_value=PrintJobs.JOB1_DONE.get())
+        self.__patcher.start()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self.__patcher.stop()
+
+
 @use_as_rights_data_provider('/session')
 class TestSessionRights(CommonRightsTest):
     INIT_PUSH = [('/users', [Users.USER2])]
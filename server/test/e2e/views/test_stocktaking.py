@@ -139,6 +139,12 @@ class TestStocktakingItemWithPreFilledDb(CommonApiTest):
         self.assertApiGet(expected_data=[StocktakingItems.ITEM1,
                                          StocktakingItems.ITEM2])
 
+    def test_list_stocktaking_items_by_location(self):
+        self.assertApiGet(url_suffix='?sort=location', expected_data=[StocktakingItems.ITEM2,
+                                                                      StocktakingItems.ITEM1])
+        self.assertApiGet(url_suffix='?location_prefix=B02%2F&sort=location', expected_data=[StocktakingItems.ITEM1])
+        self.assertApiGet(url_suffix='?location_prefix=C', expected_data=[])
+
     def test_can_not_list_stocktaking_items_of_a_non_existed_stocktaking(self):
         self.assertApiGet(endpoint=self.BAD_ENDPOINT,
                           expected_status_codes=404)
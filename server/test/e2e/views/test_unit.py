@@ -57,3 +57,14 @@ class TestUnitWithPreFilledDb(CommonApiTest):
         request = Units.UNIT2.set(change={'unit': Units.UNIT1['unit']})
 
         self.assertApiPut(Units.UNIT2['id'], data=request, expected_status_codes=422)
+
+    def test_list_units_by_prefix(self):
+        self.assertApiGet(url_suffix='?q=p', expected_data=[Units.UNIT2])
+        self.assertApiGet(url_suffix='?q=m', expected_data=[Units.UNIT1])
+        self.assertApiGet(url_suffix='?q=pcs&limit=1', expected_data=[Units.UNIT2])
+        self.assertApiGet(url_suffix='?q=kg', expected_data=[])
+        self.assertApiGet(url_suffix='?q=PC', expected_data=[Units.UNIT2])
+
+    def test_list_units_by_prefix_accent_insensitively(self):
+        self.assertApiPost(data=Units.UNIT1.set(change={'unit': 'Árú'}))
+        self.assertApiGet(url_suffix='?q=aru', expected_data=[{'id': 3, 'unit': 'Árú'}])
@@ -57,3 +57,13 @@ class TestUserWithPreFilledDb(CommonApiTest):
         request = Vendors.VENDOR2.set(change={'name': Vendors.VENDOR1['name']})
 
         self.assertApiPut(Vendors.VENDOR2['id'], data=request, expected_status_codes=422)
+
+    def test_list_vendors_by_name_prefix(self):
+        self.assertApiGet(url_suffix='?q=star', expected_data=[Vendors.VENDOR2])
+        self.assertApiGet(url_suffix='?q=HEAVY%20d', expected_data=[Vendors.VENDOR1])
+        self.assertApiGet(url_suffix='?q=Ltd', expected_data=[])
+        self.assertApiGet(url_suffix='?q=', expected_data=[Vendors.VENDOR1, Vendors.VENDOR2])
+
+    def test_list_first_vendors_by_name_prefix(self):
+        self.assertApiPost(data=Vendors.VENDOR1.set(change={'name': 'Árvíztűrő Kft.'}))
+        self.assertApiGet(url_suffix='?q=a&sort=name&limit=1', expected_data=[{'id': 3, 'name': 'Árvíztűrő Kft.'}])
@@ -37,6 +37,12 @@ class TestUserWithPreFilledDb(CommonApiTest):
         self.assertApiGet(expected_data=[Works.WORK1,
                                          Works.WORK2])
 
+    def test_list_filtered_works(self):
+        self.assertApiGet(url_suffix='?customer_id=2', expected_data=[Works.WORK2])
+        self.assertApiGet(url_suffix='?open=1', expected_data=[Works.WORK1,
+                                                               Works.WORK2])
+        self.assertApiGet(url_suffix='?open=0', expected_data=[])
+
     def test_get_work(self):
         self.assertApiGet(2, expected_data=Works.WORK2)
         self.assertApiGet(1, expected_data=Works.WORK1)
@@ -187,6 +193,37 @@ class TestWorkItemWithPreFilledDb(CommonApiTest):
         self.assertApiGet(expected_data=[WorkItems.ITEM1,
                                          WorkItems.ITEM2])
 
+    def test_list_work_items_by_location(self):
+        self.assertApiGet(url_suffix='?sort=location&fields=id,outbound_quantity',
+                          expected_data=[WorkItems.ITEM2.get(['id', 'outbound_quantity']),
+                                         WorkItems.ITEM1.get(['id', 'outbound_quantity'])])
+        self.assertApiGet(url_suffix='?location_prefix=A', expected_data=[WorkItems.ITEM2])
+
+    def test_list_work_items_by_location_and_pages(self):
+        response = self.assertApiGet(url_suffix='?sort=location&limit=1&fields=id',
+                                     expected_data=[WorkItems.ITEM2.get(['id'])])
+        self.assertApiGet(url_suffix='?sort=location&limit=1&fields=id&after_id={}'.format(
+            response.headers['X-Next-After-Id']), expected_data=[WorkItems.ITEM1.get(['id'])])
+
+    def test_list_work_items_by_pages_and_fields(self):
+        response = self.assertApiGet(url_suffix='?limit=1&fields=id,item',
+                                     expected_data=[WorkItems.ITEM1.get(['id', 'item'])])
+        assert response.headers['X-Next-After-Id'] == '1'
+
+        self.assertApiGet(url_suffix='?limit=1&after_id=1&fields=id,item',
+                          expected_data=[WorkItems.ITEM2.get(['id', 'item'])])
+
+    def test_list_work_items_with_included_objects(self):
+        self.assertApiGet(url_suffix='?included=1&limit=1',
+                          expected_data={
+                              'items': [dict(WorkItems.ITEM1.get(), item=2)],
+                              'included': {
+                                  'item': {'2': dict(Items.ITEM2.get(), vendor=2, unit=1)},
+                                  'vendor': {'2': Vendors.VENDOR2.get()},
+                                  'unit': {'1': Units.UNIT1.get()},
+                              },
+                          })
+
     def test_can_not_list_work_items_of_a_non_existed_work(self):
         self.assertApiGet(endpoint=self.BAD_ENDPOINT,
                           expected_status_codes=404)
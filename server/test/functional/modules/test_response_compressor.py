@@ -0,0 +1,80 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+import zlib
+from flask import Flask, jsonify
+
+from app.modules.response_compressor import ResponseCompressor
+
+
+class TestResponseCompressor(unittest.TestCase):
+    DATA = {'items': [{'id': i, 'name': 'Item {}'.format(i)} for i in range(100)]}
+
+    def setUp(self):
+        self.static_dir = tempfile.TemporaryDirectory()
+        self.static_path = os.path.join(self.static_dir.name, 'app.js')
+        with open(self.static_path, 'w') as fd:
+            fd.write('var foo = 1;\n' * 100)
+
+        app = Flask(__name__, static_folder=self.static_dir.name, static_url_path='/static')
+        app.add_url_rule('/large', 'large', lambda: jsonify(self.DATA))
+        app.add_url_rule('/small', 'small', lambda: jsonify({'id': 1}))
+        self.compressor = ResponseCompressor(app, level=6, min_size=100)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        self.static_dir.cleanup()
+
+    def test_response_is_not_compressed_without_accepted_encoding(self):
+        response = self.client.get('/large')
+        assert 'Content-Encoding' not in response.headers
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert json.loads(response.data.decode('utf-8')) == self.DATA
+
+    def test_response_is_compressed_by_gzip(self):
+        response = self.client.get('/large', headers={'Accept-Encoding': 'deflate;q=0.5, gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert int(response.headers['Content-Length']) == len(response.data)
+        assert json.loads(gzip.decompress(response.data).decode('utf-8')) == self.DATA
+
+    def test_response_is_compressed_by_deflate(self):
+        response = self.client.get('/large', headers={'Accept-Encoding': 'deflate'})
+        assert response.headers['Content-Encoding'] == 'deflate'
+        assert json.loads(zlib.decompress(response.data).decode('utf-8')) == self.DATA
+
+    def test_small_response_is_not_compressed(self):
+        response = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+    def test_static_file_is_compressed_with_weak_etag(self):
+        response = self.client.get('/static/app.js', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['ETag'].startswith('W/')
+        assert gzip.decompress(response.data) == b'var foo = 1;\n' * 100
+
+        response = self.client.get('/static/app.js', headers={'Accept-Encoding': 'gzip',
+                                                              'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304
+
+    def test_compressed_static_file_is_cached_until_modification(self):
+        headers = {'Accept-Encoding': 'gzip'}
+        self.client.get('/static/app.js', headers=headers)
+        self.__write_file(self.static_path, b'var bar = 2;\n' * 100, mtime=os.path.getmtime(self.static_path))
+        assert gzip.decompress(self.client.get('/static/app.js', headers=headers).data) == b'var foo = 1;\n' * 100
+
+        self.__write_file(self.static_path, b'bar' * 100, mtime=os.path.getmtime(self.static_path) + 10)
+        assert gzip.decompress(self.client.get('/static/app.js', headers=headers).data) == b'bar' * 100
+
+    def test_precompressed_static_file_is_used(self):
+        self.__write_file(self.static_path + '.gz', gzip.compress(b'precompressed'),
+                          mtime=os.path.getmtime(self.static_path) + 10)
+
+        response = self.client.get('/static/app.js', headers={'Accept-Encoding': 'gzip'})
+        assert gzip.decompress(response.data) == b'precompressed'
+
+    def __write_file(self, path: str, data: bytes, mtime: float):
+        with open(path, 'wb') as fd:
+            fd.write(data)
+        os.utime(path, (mtime, mtime))
@@ -0,0 +1,26 @@
+import unittest
+
+from app.models import Customer, Item, Vendor
+
+
+class TestNormalizedFields(unittest.TestCase):
+    def test_normalized_fields_follow_changes(self):
+        item = Item(name='Árvíztűrő Tükörfúrógép', article_number='FŐ-213546')
+        assert item.normalized_name == 'arvizturo tukorfurogep'
+        assert item.normalized_article_number == 'fo-213546'
+
+        item.name = 'Csőfogó'
+        item.article_number = None
+        assert item.normalized_name == 'csofogo'
+        assert item.normalized_article_number is None
+
+    def test_names_of_vendors_and_customers_are_normalized(self):
+        assert Vendor(name='Öntödei Kft.').normalized_name == 'ontodei kft.'
+        assert Customer(name='Ügyfél').normalized_name == 'ugyfel'
+
+    def test_location_sort_key_follows_changes(self):
+        item = Item(name='Pipe', location='A12/3')
+        assert item.location_sort_key == 'a0212/013'
+
+        item.location = None
+        assert item.location_sort_key is None
@@ -94,3 +94,124 @@ class TestComplexSerializers(unittest.TestCase):
         assert {'id': 2, 'last_name': 'Bar', 'start': '2000-01-02T13:14:15.000678+00:00',
                 'nested2': {'id': 3, 'stop': '2014-05-06T17:28:29.000321+00:00'}} == \
             self.Serializer().dump(Data)
+
+
+class TestPartialSerializer(unittest.TestCase):
+    class NestedSerializer(BasicSerializer):
+        fields = ('id', )
+        datetime_fields = ('stop', )
+
+    class Serializer(BasicSerializer):
+        fields = ('id', 'last_name')
+        datetime_fields = ('start', 'stop')
+        nested_fields = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Serializer.nested_fields['nested2'] = cls.NestedSerializer()
+
+    def test_field_names(self):
+        assert {'id', 'last_name', 'start', 'stop', 'nested2'} == self.Serializer().field_names
+
+    def test_with_none(self):
+        assert {'id': None, 'stop': None, 'nested2': {'id': None, 'stop': None}} == \
+            self.Serializer().only({'id', 'stop', 'nested2'}).dump(None)
+
+    def test_with_data(self):
+        assert {'last_name': 'Bar', 'start': '2000-01-02T13:14:15.000678+00:00'} == \
+            self.Serializer().only(['last_name', 'start']).dump(Data)
+
+    def test_partial_serializer_is_reused(self):
+        serializer = self.Serializer()
+        assert serializer.only({'id', 'start'}) is serializer.only(['start', 'id'])
+
+
+class TestSerializerWithCustomDateFormat(unittest.TestCase):
+    class Serializer(BasicSerializer):
+        REST_API_DATE_FORMAT = '%Y.%m.%d %H:%M'
+        datetime_fields = ('start', 'stop')
+
+    def test_with_data(self):
+        assert {'start': '2000.01.02 13:14', 'stop': '2000.01.02 13:24'} == self.Serializer().dump(Data)
+
+
+class TestSerializerWithNotInlinedNestedSerializer(unittest.TestCase):
+    class NestedSerializer(BasicSerializer):
+        def dump(self, model_object) -> dict:
+            return 'custom {!r}'.format(model_object is None)
+
+    class Serializer(BasicSerializer):
+        fields = ('id', )
+        nested_fields = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Serializer.nested_fields['nested1'] = cls.NestedSerializer()
+
+    def test_with_none(self):
+        assert {'id': None, 'nested1': 'custom True'} == self.Serializer().dump(None)
+
+    def test_with_data(self):
+        assert {'id': 2, 'nested1': 'custom False'} == self.Serializer().dump(Data)
+
+
+class TestIncludedSerializer(unittest.TestCase):
+    class NestedSerializer(BasicSerializer):
+        fields = ('id', )
+        datetime_fields = ('stop', )
+
+    class Serializer(BasicSerializer):
+        fields = ('id', 'last_name')
+        nested_fields = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Serializer.nested_fields['nested1'] = cls.NestedSerializer()
+
+    def test_nested_objects_are_included_once(self):
+        no_nested_data = type('NoNestedData', (Data, ), {'nested1': None})
+
+        assert {'items': [{'id': 2, 'last_name': 'Bar', 'nested1': 3},
+                          {'id': 2, 'last_name': 'Bar', 'nested1': None},
+                          {'id': 2, 'last_name': 'Bar', 'nested1': 3}],
+                'included': {'nested1': {'3': {'id': 3, 'stop': '2014-05-06T17:28:29.000321+00:00'}}}} == \
+            self.Serializer().dump_many_included([Data, no_nested_data, Data])
+
+
+class TestCompiledSerializer(unittest.TestCase):
+    class NestedSerializer(BasicSerializer):
+        fields = ('id', )
+        datetime_fields = ('start', 'stop')
+
+    class Serializer(BasicSerializer):
+        fields = ('id', 'first_name', 'last_name')
+        datetime_fields = ('start', )
+        nested_fields = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Serializer.nested_fields['nested1'] = cls.NestedSerializer()
+        cls.Serializer.nested_fields['nested2'] = cls.NestedSerializer()
+
+    def test_result_is_same_as_the_generic_dump(self):
+        assert [self.__generic_dump(self.Serializer(), data) for data in (Data, None, Data)] == \
+            self.Serializer().dump_many([Data, None, Data])
+
+    def test_results_of_none_are_independent(self):
+        serializer = self.Serializer()
+        result = serializer.dump(None)
+        result['nested1']['id'] = 1
+
+        assert serializer.dump(None)['nested1']['id'] is None
+
+    def __generic_dump(self, serializer: BasicSerializer, model_object) -> dict:
+        if model_object is None:
+            model_object = type('NoneData', (), dict((name, None) for name in serializer.field_names))
+
+        result = dict((name, getattr(model_object, name)) for name in serializer.fields)
+        for name in serializer.datetime_fields:
+            date = getattr(model_object, name)
+            result[name] = None if date is None else date.strftime(serializer.REST_API_DATE_FORMAT)
+        for name, nested_serializer in serializer.nested_fields.items():
+            result[name] = self.__generic_dump(nested_serializer, getattr(model_object, name))
+        return result
@@ -41,6 +41,33 @@ class TestFilterDict:
         }
 
 
+class TestNormalizeText:
+    def test_accents_and_case_are_removed(self):
+        assert common.normalize_text('Árvíztűrő TÜKÖRFÚRÓGÉP') == 'arvizturo tukorfurogep'
+        assert common.normalize_text('SK-132465') == 'sk-132465'
+
+    def test_none_is_kept(self):
+        assert common.normalize_text(None) is None
+
+
+class TestGetNaturalSortKey:
+    def test_numbers_are_ordered_by_value(self):
+        locations = ['B02/01', 'a12/12', 'A2/3', 'A12/3', 'A12', 'A2/10']
+        assert sorted(locations, key=common.get_natural_sort_key) == ['A2/3', 'A2/10', 'A12', 'A12/3', 'a12/12',
+                                                                      'B02/01']
+
+    def test_leading_zeros_are_ignored(self):
+        assert common.get_natural_sort_key('B02/01') == common.get_natural_sort_key('b2/1') == 'b012/011'
+        assert common.get_natural_sort_key('A00') == 'a010'
+
+    def test_long_numbers_are_ordered_by_value(self):
+        locations = ['A1234567890', 'A12', 'A3']
+        assert sorted(locations, key=common.get_natural_sort_key) == ['A3', 'A12', 'A1234567890']
+
+    def test_none_is_kept(self):
+        assert common.get_natural_sort_key(None) is None
+
+
 class TestRecursiveDictUpdate:
     @pytest.fixture
     def single_level(self):
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.models import Counter
+from app.modules.hi_lo_allocator import HiLoAllocator
+
+
+@pytest.fixture
+def engine(tmpdir):
+    engine = create_engine('sqlite:///{}'.format(tmpdir.join('counter.sqlite')))
+    Counter.__table__.create(engine)
+    return engine
+
+
+def get_counter_value(engine, name: str) -> int:
+    return engine.execute(select([Counter.value]).where(Counter.name == name)).scalar()
+
+
+class TestHiLoAllocator:
+    def test_numbers_are_allocated_from_first_number(self, engine):
+        allocator = HiLoAllocator('foo', block_size=3, get_first_number=lambda connection: 42)
+
+        assert [allocator.allocate(engine) for _ in range(4)] == [42, 43, 44, 45]
+        assert get_counter_value(engine, 'foo') == 48
+
+    def test_numbers_are_allocated_from_memory_in_a_block(self, engine):
+        allocator = HiLoAllocator('foo', block_size=3, get_first_number=lambda connection: 1)
+        allocator.allocate(engine)
+
+        engine.execute(Counter.__table__.update().values(value=100))
+        assert [allocator.allocate(engine) for _ in range(3)] == [2, 3, 100]
+
+    def test_allocators_of_processes_get_different_blocks(self, engine):
+        allocator1 = HiLoAllocator('foo', block_size=2, get_first_number=lambda connection: 1)
+        allocator2 = HiLoAllocator('foo', block_size=2, get_first_number=lambda connection: 1)
+
+        numbers = [allocator1.allocate(engine), allocator2.allocate(engine), allocator1.allocate(engine),
+                   allocator2.allocate(engine), allocator2.allocate(engine), allocator1.allocate(engine)]
+        assert numbers == [1, 3, 2, 4, 5, 7]
+
+    def test_contiguous_block_is_allocated_by_counter(self, engine):
+        allocator = HiLoAllocator('foo', block_size=3, get_first_number=lambda connection: 1)
+
+        assert allocator.allocate(engine) == 1
+        assert allocator.allocate_block(engine, 5) == range(4, 9)
+        assert allocator.allocate(engine) == 2
+        assert get_counter_value(engine, 'foo') == 9
+
+    def test_counters_are_independent(self, engine):
+        foo_allocator = HiLoAllocator('foo', block_size=2, get_first_number=lambda connection: 1)
+        bar_allocator = HiLoAllocator('bar', block_size=2, get_first_number=lambda connection: 10)
+
+        assert [foo_allocator.allocate(engine), bar_allocator.allocate(engine)] == [1, 10]
+
+    def test_first_number_is_got_only_for_new_counter(self, engine):
+        first_numbers = []
+
+        def get_first_number(connection):
+            first_numbers.append(1)
+            return 1
+
+        allocator = HiLoAllocator('foo', block_size=1, get_first_number=get_first_number)
+        assert [allocator.allocate(engine) for _ in range(3)] == [1, 2, 3]
+        assert first_numbers == [1]
+
+    def test_reserved_blocks_are_forgotten_by_reset(self, engine):
+        allocator = HiLoAllocator('foo', block_size=10, get_first_number=lambda connection: 1)
+        allocator.allocate(engine)
+
+        Counter.__table__.drop(engine)
+        Counter.__table__.create(engine)
+        assert allocator.allocate(engine) == 1
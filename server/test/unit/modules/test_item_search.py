@@ -0,0 +1,48 @@
+import unittest
+
+from app.models import Item, Barcode
+from app.modules.item_search import TrigramIndex
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex()
+        self.index.update(Item, 1, ('Spray', 'sk132465'))
+        self.index.update(Item, 2, ('Pipe', 'FO213546'))
+        self.index.update(Item, 3, ('Screw', None))
+        self.index.update(Item, 4, ('Tükörfúrógép', None))
+        self.index.update(Barcode, 1, ('9843-184125', ))
+
+    def test_trigrams_of_text(self):
+        assert TrigramIndex.get_trigrams('pipe') == {'pip', 'ipe'}
+        assert TrigramIndex.get_trigrams('pi') == set()
+
+    def test_find_substring_case_insensitively(self):
+        assert self.index.find(Item, 'ipe') == [2]
+        assert self.index.find(Item, '2135') == [2]
+        assert self.index.find(Item, 'sk13') == [1]
+        assert self.index.find(Item, 'spray sk') == []
+        assert self.index.find(Barcode, '3-18') == [1]
+        assert self.index.find(Barcode, 'ipe') == []
+
+    def test_expressions_shorter_than_a_trigram_are_not_searched(self):
+        assert self.index.find(Item, 'S') is None
+        assert self.index.find(Item, 'pi') is None
+        assert self.index.find(Item, ' ') is None
+
+    def test_find_substring_accent_insensitively(self):
+        assert self.index.find(Item, 'furogep') == [4]
+        assert self.index.find(Item, 'FÚRÓ') == [4]
+
+    def test_find_follows_updates_and_removals(self):
+        self.index.update(Item, 2, ('Hose', 'FO213546'))
+        assert self.index.find(Item, 'pipe') == []
+        assert self.index.find(Item, 'hose') == [2]
+
+        self.index.update(Item, 2, None)
+        assert self.index.find(Item, 'hose') == []
+        assert self.index.find(Item, '2135') == []
+
+    def test_changes_are_not_applied_before_build(self):
+        self.index.apply([(Item, 4, ('Hose', None))])
+        assert self.index.find(Item, 'hose') == []
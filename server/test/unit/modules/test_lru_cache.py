@@ -0,0 +1,36 @@
+import unittest
+
+from app.modules.lru_cache import LruCache
+
+
+class TestLruCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LruCache(max_size=2)
+
+    def test_least_recently_used_value_is_dropped(self):
+        self.cache.set('apple', 1)
+        self.cache.set('banana', 2)
+        assert self.cache.get('apple') == 1
+
+        self.cache.set('orange', 3)
+        assert self.cache.get('banana') is None
+        assert self.cache.get('apple') == 1
+        assert self.cache.get('orange') == 3
+
+    def test_statistics(self):
+        self.cache.set('apple', 1)
+        self.cache.get('apple')
+        self.cache.get('apple')
+        self.cache.get('kiwi', default=0)
+        assert self.cache.get_statistics() == {'max_size': 2, 'size': 1, 'hits': 2, 'misses': 1}
+
+    def test_clear(self):
+        self.cache.set('apple', 1)
+        self.cache.clear()
+        assert self.cache.get('apple', default=0) == 0
+
+    def test_disabled_cache(self):
+        cache = LruCache(max_size=0)
+        cache.set('apple', 1)
+        assert cache.get('apple') is None
+        assert cache.get_statistics()['size'] == 0
@@ -0,0 +1,194 @@
+import json
+import os
+import pytest
+import sqlite3
+import threading
+from unittest import mock
+
+from app.modules import persistent_storage
+from app.modules.persistent_storage import PersistentStorage
+
+
+@pytest.fixture(autouse=True)
+def storage_dir(request, tmpdir):
+    patcher = mock.patch.object(persistent_storage, 'persistent_storage_dir', str(tmpdir))
+    patcher.start()
+    request.addfinalizer(patcher.stop)
+    return tmpdir
+
+
+class TestJsonFileBackend:
+    def test_changes_are_saved(self, storage_dir):
+        with PersistentStorage('fruits', backend='json') as storage:
+            assert storage.get('apple', default=12) == 12
+            storage.set('apple', 20)
+
+        with PersistentStorage('fruits', read_only=True, backend='json') as storage:
+            assert storage.get('apple') == 20
+        assert json.loads(storage_dir.join('fruits.json').read()) == {'apple': 20}
+
+    def test_changes_replace_the_file(self, storage_dir):
+        with PersistentStorage('fruits', backend='json') as storage:
+            storage.set('apple', 20)
+        inode = os.stat(str(storage_dir.join('fruits.json'))).st_ino
+
+        with PersistentStorage('fruits', backend='json') as storage:
+            storage.set('apple', 21)
+        assert os.stat(str(storage_dir.join('fruits.json'))).st_ino != inode
+        assert sorted(os.listdir(str(storage_dir))) == ['fruits.json', 'fruits.json.lck']
+
+    def test_file_is_not_changed_by_failed_save(self, storage_dir):
+        with PersistentStorage('fruits', backend='json') as storage:
+            storage.set('apple', 20)
+
+        with pytest.raises(TypeError):
+            with PersistentStorage('fruits', backend='json') as storage:
+                storage.set('apple', object())
+
+        assert json.loads(storage_dir.join('fruits.json').read()) == {'apple': 20}
+        assert sorted(os.listdir(str(storage_dir))) == ['fruits.json', 'fruits.json.lck']
+
+    def test_unchanged_file_is_not_parsed_again(self):
+        with PersistentStorage('fruits', backend='json') as storage:
+            storage.set('apple', 20)
+
+        with mock.patch.object(persistent_storage.json, 'load') as load:
+            with PersistentStorage('fruits', read_only=True, backend='json') as storage:
+                assert storage.get('apple') == 20
+        assert not load.called
+
+    def test_file_changed_by_another_process_is_parsed_again(self, storage_dir):
+        with PersistentStorage('fruits', backend='json') as storage:
+            storage.set('apple', 20)
+
+        storage_dir.join('fruits.json').write(json.dumps({'apple': 300}))
+        with PersistentStorage('fruits', read_only=True, backend='json') as storage:
+            assert storage.get('apple') == 300
+
+    def test_changes_of_not_saved_storage_are_not_cached(self):
+        with PersistentStorage('fruits', backend='json') as storage:
+            storage.set('basket', ['apple'])
+
+        with PersistentStorage('fruits', backend='json') as storage:
+            storage.get('basket').append('orange')
+
+        with PersistentStorage('fruits', read_only=True, backend='json') as storage:
+            assert storage.get('basket') == ['apple']
+
+    def test_read_only_storages_share_the_lock(self):
+        with PersistentStorage('fruits', read_only=True, backend='json') as storage:
+            with mock.patch.object(persistent_storage.fcntl, 'flock') as flock:
+                with PersistentStorage('fruits', read_only=True, backend='json'):
+                    pass
+            assert flock.call_args_list[0][0][1] == persistent_storage.fcntl.LOCK_SH
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def backend(request) -> str:
+    return request.param
+
+
+class TestPersistentStorage:
+    def test_changes_are_saved(self, backend):
+        with PersistentStorage('fruits', backend=backend) as storage:
+            assert storage.get('apple') is None
+            assert storage.get('apple', default=12) == 12
+            storage.set('apple', 20)
+            storage.set('basket', {'pear': [1, 2]})
+            assert storage.get('apple') == 20
+
+        with PersistentStorage('fruits', read_only=True, backend=backend) as storage:
+            assert storage.get('apple') == 20
+            assert storage.get('basket') == {'pear': [1, 2]}
+
+    def test_names_are_independent(self, backend):
+        with PersistentStorage('fruits', backend=backend) as storage:
+            storage.set('apple', 20)
+
+        with PersistentStorage('vegetables', backend=backend) as storage:
+            assert storage.get('apple') is None
+
+    def test_deleted_value_is_missing(self, backend):
+        with PersistentStorage('fruits', backend=backend) as storage:
+            storage.set('apple', 20)
+            storage.set('pear', 30)
+
+        with PersistentStorage('fruits', backend=backend) as storage:
+            storage.delete('apple')
+            storage.delete('orange')
+
+        with PersistentStorage('fruits', read_only=True, backend=backend) as storage:
+            assert storage.get('apple') is None
+            assert storage.get('pear') == 30
+
+    def test_counter_is_incremented(self, backend):
+        with PersistentStorage('fruits', backend=backend) as storage:
+            assert storage.incr('last_number') == 1
+            assert storage.incr('last_number', amount=10) == 11
+
+        with PersistentStorage('fruits', backend=backend) as storage:
+            assert storage.incr('last_number') == 12
+            assert storage.get('last_number') == 12
+
+    def test_counter_is_incremented_by_concurrent_threads(self, backend):
+        def increment():
+            for _ in range(20):
+                with PersistentStorage('fruits', backend=backend) as storage:
+                    storage.incr('last_number')
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with PersistentStorage('fruits', read_only=True, backend=backend) as storage:
+            assert storage.get('last_number') == 80
+
+    def test_changes_are_dropped_by_exception(self, backend):
+        with PersistentStorage('fruits', backend=backend) as storage:
+            storage.set('apple', 20)
+
+        with pytest.raises(ValueError):
+            with PersistentStorage('fruits', backend=backend) as storage:
+                storage.set('apple', 21)
+                storage.incr('last_number')
+                raise ValueError('Failed')
+
+        with PersistentStorage('fruits', read_only=True, backend=backend) as storage:
+            assert storage.get('apple') == 20
+            assert storage.get('last_number') is None
+
+    def test_can_not_change_read_only_storage(self, backend):
+        with PersistentStorage('fruits', read_only=True, backend=backend) as storage:
+            with pytest.raises(RuntimeError):
+                storage.set('apple', 20)
+            with pytest.raises(RuntimeError):
+                storage.incr('last_number')
+            with pytest.raises(RuntimeError):
+                storage.delete('apple')
+
+    def test_backend_is_configurable(self, storage_dir):
+        with mock.patch.dict(persistent_storage.config['App'], {'PERSISTENT_STORAGE_BACKEND': 'sqlite'}):
+            with PersistentStorage('fruits') as storage:
+                storage.set('apple', 20)
+        assert storage_dir.join(persistent_storage.SqliteBackend.DATABASE_FILE_NAME).check()
+
+
+class TestSqliteBackend:
+    def test_database_is_in_wal_mode(self, storage_dir):
+        with PersistentStorage('fruits', backend='sqlite') as storage:
+            storage.set('apple', 20)
+
+        connection = sqlite3.connect(str(storage_dir.join(persistent_storage.SqliteBackend.DATABASE_FILE_NAME)))
+        assert connection.execute('PRAGMA journal_mode').fetchone() == ('wal', )
+        connection.close()
+
+    def test_reader_does_not_wait_for_writer(self):
+        with PersistentStorage('fruits', backend='sqlite') as storage:
+            storage.set('apple', 20)
+
+        with PersistentStorage('fruits', backend='sqlite') as storage:
+            storage.set('apple', 21)
+            with PersistentStorage('fruits', read_only=True, backend='sqlite') as reader:
+                assert reader.get('apple') == 20
@@ -0,0 +1,108 @@
+import pytest
+import threading
+import time
+from unittest import mock
+
+from app.modules import persistent_storage
+from app.modules.print_queue import PrintQueue
+from app.modules.printer import TransientPrinterError
+
+
+@pytest.fixture(autouse=True)
+def storage_dir(request, tmpdir):
+    patcher = mock.patch.object(persistent_storage, 'persistent_storage_dir', str(tmpdir))
+    patcher.start()
+    request.addfinalizer(patcher.stop)
+    return tmpdir
+
+
+def wait_for_job(print_queue: PrintQueue, job_id: int) -> dict:
+    for _ in range(500):
+        job = print_queue.get_job(job_id)
+        if job['status'] in (PrintQueue.DONE, PrintQueue.FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError('Print job {!s} is not finished'.format(job_id))
+
+
+class TestPrintQueue:
+    def test_job_is_printed_in_background(self):
+        print_queue = PrintQueue(worker_count=1, retry_count=2, retry_delay=0, kept_job_count=10)
+        label_printer = mock.Mock()
+
+        job = print_queue.submit(label_printer, copies=3)
+        assert job == {'id': 1, 'status': 'queued', 'copies': 3, 'printed_copies': 0, 'attempts': 0, 'error': None}
+
+        assert wait_for_job(print_queue, 1) == {'id': 1, 'status': 'done', 'copies': 3, 'printed_copies': 3,
+                                                'attempts': 1, 'error': None}
+        label_printer.print.assert_called_once_with(copies=3)
+
+    def test_one_label_per_job(self):
+        print_queue = PrintQueue(worker_count=1, retry_count=2, retry_delay=0, kept_job_count=10,
+                                 one_label_per_job=True)
+        label_printer = mock.Mock()
+
+        print_queue.submit(label_printer, copies=3)
+        assert wait_for_job(print_queue, 1)['printed_copies'] == 3
+        assert label_printer.print.call_args_list == [mock.call(copies=1)] * 3
+
+    def test_transient_error_is_retried_by_the_not_printed_copies(self):
+        print_queue = PrintQueue(worker_count=1, retry_count=2, retry_delay=0, kept_job_count=10,
+                                 one_label_per_job=True)
+        label_printer = mock.Mock()
+        label_printer.print.side_effect = [None, TransientPrinterError('Printer is busy'), None, None]
+
+        print_queue.submit(label_printer, copies=3)
+        job = wait_for_job(print_queue, 1)
+        assert (job['status'], job['printed_copies'], job['attempts'], job['error']) == ('done', 3, 2, None)
+        assert label_printer.print.call_count == 4
+
+    def test_job_fails_after_too_many_transient_errors(self):
+        print_queue = PrintQueue(worker_count=1, retry_count=2, retry_delay=0, kept_job_count=10)
+        label_printer = mock.Mock()
+        label_printer.print.side_effect = TransientPrinterError('Printer is busy')
+
+        print_queue.submit(label_printer)
+        job = wait_for_job(print_queue, 1)
+        assert (job['status'], job['printed_copies'], job['attempts'], job['error']) == \
+            ('failed', 0, 3, 'Printer is busy')
+
+    def test_other_errors_are_not_retried(self):
+        print_queue = PrintQueue(worker_count=1, retry_count=2, retry_delay=0, kept_job_count=10)
+        label_printer = mock.Mock()
+        label_printer.print.side_effect = RuntimeError('Missing printer')
+
+        print_queue.submit(label_printer)
+        job = wait_for_job(print_queue, 1)
+        assert (job['status'], job['attempts'], job['error']) == ('failed', 1, 'Missing printer')
+
+    def test_last_jobs_are_kept_only(self):
+        print_queue = PrintQueue(worker_count=1, retry_count=2, retry_delay=0, kept_job_count=2)
+
+        for job_id in range(1, 4):
+            assert print_queue.submit(mock.Mock())['id'] == job_id
+            wait_for_job(print_queue, job_id)
+
+        assert print_queue.get_job(1) is None
+        assert print_queue.get_job(2)['status'] == 'done'
+        assert print_queue.get_job(3)['status'] == 'done'
+
+    def test_concurrent_jobs_are_not_lost(self):
+        print_queue = PrintQueue(worker_count=4, retry_count=2, retry_delay=0, kept_job_count=100,
+                                 one_label_per_job=True)
+        job_ids = []
+
+        def submit():
+            for _ in range(5):
+                job_ids.append(print_queue.submit(mock.Mock(), copies=3)['id'])
+
+        threads = [threading.Thread(target=submit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(job_ids) == list(range(1, 21))
+        for job_id in job_ids:
+            job = wait_for_job(print_queue, job_id)
+            assert (job['status'], job['printed_copies']) == ('done', 3)
@@ -0,0 +1,28 @@
+import json
+import unittest
+from unittest import mock
+
+from app.modules import restful_api
+
+
+class TestOutputJson(unittest.TestCase):
+    DATA = {'id': 1, 'name': 'Spray/Foo', 'vendor': {'id': 2, 'name': 'Árvíztűrő'}, 'quantity': 60.4, 'unit': None}
+
+    def test_data_is_encoded_compactly(self):
+        response = restful_api.output_json(self.DATA, 201, {'X-Foo': 'bar'})
+
+        assert response.status_code == 201
+        assert response.mimetype == 'application/json'
+        assert response.headers['X-Foo'] == 'bar'
+        assert b'\n' not in response.data
+        assert json.loads(response.data.decode('utf-8')) == self.DATA
+
+    def test_data_is_encoded_without_fast_encoder(self):
+        with mock.patch.object(restful_api, 'ujson', None):
+            response = restful_api.output_json(self.DATA, 200)
+
+        assert response.data == json.dumps(self.DATA, separators=(',', ':')).encode('utf-8')
+
+    def test_encoded_data_is_sent_as_is(self):
+        response = restful_api.output_json(b'[1,2]', 200)
+        assert response.data == b'[1,2]'
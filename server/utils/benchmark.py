@@ -0,0 +1,162 @@
+#!../flask/bin/python
+"""
+Micro benchmarks of performance critical parts
+
+Usage: benchmark.py [name ...]
+"""
+import json
+import sys
+import os.path
+import timeit
+from datetime import datetime
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.join(basedir, '..'))
+
+from flask import Flask
+from flask.ext.restful.representations.json import output_json as restful_output_json
+
+from app.modules.basic_serializer import BasicSerializer
+from app.modules import restful_api
+
+
+class LegacySerializer:
+    """
+    The generic BasicSerializer implementation before the compiled dump functions
+    """
+    REST_API_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f+00:00'
+
+    fields = ()
+    datetime_fields = ()
+    nested_fields = {}
+
+    def dump(self, model_object) -> dict:
+        if model_object is None:
+            return self._dump_nones()
+
+        result = dict((name, getattr(model_object, name)) for name in self.fields)
+
+        for name in self.datetime_fields:
+            date = getattr(model_object, name)
+            if date is None:
+                result[name] = None
+            else:
+                result[name] = date.strftime(self.REST_API_DATE_FORMAT)
+
+        for name, serializer in self.nested_fields.items():
+            result[name] = serializer.dump(getattr(model_object, name))
+
+        return result
+
+    def dump_many(self, items) -> list:
+        return [self.dump(item) for item in items]
+
+    def _dump_nones(self) -> dict:
+        result = dict((name, None) for name in self.fields)
+
+        for name in self.datetime_fields:
+            result[name] = None
+
+        for name, serializer in self.nested_fields.items():
+            result[name] = serializer.dump(None)
+
+        return result
+
+
+def make_serializers(base_class: type) -> BasicSerializer:
+    """
+    Make the serializer of work items (like app.serializers) on the given base class
+    """
+    named = type('NamedSerializer', (base_class, ), {'fields': ('id', 'name')})
+    unit = type('UnitSerializer', (base_class, ), {'fields': ('id', 'unit')})
+    user = type('UserSerializer', (base_class, ), {'fields': ('id', 'username', 'email', 'admin', 'disabled')})
+    item = type('ItemSerializer', (base_class, ), {
+        'fields': ('id', 'name', 'article_number', 'quantity', 'warning_quantity', 'purchase_price', 'location'),
+        'nested_fields': {'vendor': named(), 'unit': unit()},
+    })
+    work = type('WorkSerializer', (base_class, ), {
+        'fields': ('id', 'comment'),
+        'datetime_fields': ('outbound_close_timestamp', 'returned_close_timestamp'),
+        'nested_fields': {'customer': named(), 'outbound_close_user': user(), 'returned_close_user': user()},
+    })
+    work_item = type('WorkItemSerializer', (base_class, ), {
+        'fields': ('id', 'outbound_quantity', 'returned_quantity'),
+        'nested_fields': {'item': item(), 'work': work()},
+    })
+    return work_item()
+
+
+class Data:
+    def __init__(self, **entries):
+        self.__dict__.update(entries)
+
+
+def make_work_items(count: int) -> list:
+    vendor = Data(id=1, name='Heavy Duty Ltd.')
+    unit = Data(id=1, unit='pcs')
+    user = Data(id=1, username='admin', email='admin@test.com', admin=True, disabled=False)
+    work = Data(id=1, comment='First work', customer=Data(id=1, name='Big Customer Ltd.'),
+                outbound_close_timestamp=datetime(2016, 3, 18, 12, 34, 56, 789), outbound_close_user=user,
+                returned_close_timestamp=None, returned_close_user=None)
+
+    return [Data(id=i, outbound_quantity=12.5, returned_quantity=None, work=work,
+                 item=Data(id=i, name='Item {}'.format(i), article_number='SK{}'.format(i), quantity=3.0,
+                           warning_quantity=1.0, purchase_price=12.3, location='A12/3', vendor=vendor, unit=unit))
+            for i in range(count)]
+
+
+def benchmark_serializer(count: int=2000, repeat: int=5):
+    """
+    Compare the compiled BasicSerializer with the former generic implementation
+    """
+    work_items = make_work_items(count)
+    legacy_serializer = make_serializers(LegacySerializer)
+    compiled_serializer = make_serializers(BasicSerializer)
+
+    if json.dumps(legacy_serializer.dump_many(work_items)) != json.dumps(compiled_serializer.dump_many(work_items)):
+        raise AssertionError('The results of serializers are different')
+
+    results = {}
+    for name, serializer in (('legacy', legacy_serializer), ('compiled', compiled_serializer)):
+        results[name] = min(timeit.repeat(lambda: serializer.dump_many(work_items), number=1, repeat=repeat))
+        print('{name:>10}: {elapsed:0.4f} s / {count} work items'.format(
+            name=name, elapsed=results[name], count=count))
+    print('   speedup: {:0.2f}x'.format(results['legacy'] / results['compiled']))
+
+
+def benchmark_json(count: int=2000, repeat: int=5):
+    """
+    Compare the JSON representation of the API with the default one of Flask-RESTful on the list of items
+    """
+    item_serializer = make_serializers(BasicSerializer).nested_fields['item']
+    items = item_serializer.dump_many([work_item.item for work_item in make_work_items(count)])
+
+    app = Flask(__name__)
+    representations = [('restful', restful_output_json), ('api', restful_api.output_json)]
+    if restful_api.ujson is None:
+        print('(ujson is not available; the API uses the standard json module)')
+
+    with app.test_request_context():
+        results = {}
+        for name, output_json in representations:
+            if json.loads(output_json(items, 200).get_data().decode('utf-8')) != items:
+                raise AssertionError('The result of {} representation is different'.format(name))
+            results[name] = min(timeit.repeat(lambda: output_json(items, 200), number=1, repeat=repeat))
+            print('{name:>10}: {elapsed:0.4f} s / {count} items'.format(name=name, elapsed=results[name], count=count))
+        print('   speedup: {:0.2f}x'.format(results['restful'] / results['api']))
+
+
+BENCHMARKS = {
+    'json': benchmark_json,
+    'serializer': benchmark_serializer,
+}
+
+
+def main(names: list):
+    for name in names or sorted(BENCHMARKS.keys()):
+        print('### {} ###'.format(name))
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
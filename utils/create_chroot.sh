@@ -161,6 +161,9 @@ gid = ${PROD_GROUP}
 # Number of workers
 workers = 4
 
+# Background threads of workers (e.g. label printing)
+enable-threads = true
+
 # The right granted on the created socket
 chmod-socket = 666
 